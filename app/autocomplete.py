@@ -0,0 +1,113 @@
+import heapq
+import sys
+import threading
+import time
+from bisect import bisect_left
+from typing import Iterable
+
+from app.part_index import tokenize
+
+
+def _number_key(number: str) -> str:
+    # Typed with or without the dash, in any case
+    return "".join(number.split()).replace("-", "").upper()
+
+
+def _name_keys(name: str) -> Iterable[str]:
+    # Every word start, so "hinge" completes "DOOR HINGE"
+    words = tokenize(name)
+    for i in range(len(words)):
+        yield " ".join(words[i:])
+
+
+def _merge(keys: list[tuple[str, str]], new: Iterable[tuple[str, str]]):
+    # Both sorted, duplicates dropped
+    merged: list[tuple[str, str]] = []
+    for entry in heapq.merge(keys, sorted(set(new))):
+        if not merged or merged[-1] != entry:
+            merged.append(entry)
+    return merged
+
+
+def _complete(keys: list[tuple[str, str]], prefix: str, limit: int) -> list[str]:
+    results: list[str] = []
+    i = bisect_left(keys, (prefix,))
+    while i < len(keys) and len(results) < limit:
+        key, value = keys[i]
+        if not key.startswith(prefix):
+            break
+        if value not in results:
+            results.append(value)
+        i += 1
+    return results
+
+
+class PrefixIndex:
+    """Sorted (key, value) arrays for part number and name completion.
+
+    Built at startup from the parts table, part writes merge their new rows
+    in. Readers only ever see a fully built array.
+    """
+
+    def __init__(self):
+        self._numbers: list[tuple[str, str]] = []
+        self._names: list[tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self.build_seconds = 0.0
+
+    def build(self, parts: Iterable[tuple[str, str]]):
+        start = time.perf_counter()
+        with self._lock:
+            numbers, names = self._keys(parts)
+            self._numbers = _merge([], numbers)
+            self._names = _merge([], names)
+        self.build_seconds = time.perf_counter() - start
+
+    def add(self, parts: Iterable[tuple[str, str]]):
+        with self._lock:
+            numbers, names = self._keys(parts)
+            self._numbers = _merge(self._numbers, numbers)
+            self._names = _merge(self._names, names)
+
+    def clear(self):
+        with self._lock:
+            self._numbers = []
+            self._names = []
+
+    def _keys(self, parts: Iterable[tuple[str, str]]):
+        numbers: list[tuple[str, str]] = []
+        names: list[tuple[str, str]] = []
+        for number, name in parts:
+            numbers.append((_number_key(number), number))
+            names.extend((key, name) for key in _name_keys(name))
+        return numbers, names
+
+    def complete_number(self, prefix: str, limit: int) -> list[str]:
+        prefix = _number_key(prefix)
+        return _complete(self._numbers, prefix, limit) if prefix else []
+
+    def complete_name(self, prefix: str, limit: int) -> list[str]:
+        prefix = " ".join(tokenize(prefix))
+        return _complete(self._names, prefix, limit) if prefix else []
+
+    def stats(self) -> dict:
+        memory = 0
+        # Strings are shared between entries, count each once
+        seen: set[int] = set()
+        for keys in (self._numbers, self._names):
+            memory += sys.getsizeof(keys)
+            for entry in keys:
+                memory += sys.getsizeof(entry)
+                for value in entry:
+                    if id(value) not in seen:
+                        seen.add(id(value))
+                        memory += sys.getsizeof(value)
+        return {
+            "numbers": len(self._numbers),
+            "names": len(self._names),
+            "memory_bytes": memory,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+part_autocomplete = PrefixIndex()
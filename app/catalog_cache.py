@@ -0,0 +1,75 @@
+import asyncio
+import threading
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, List
+
+from pydantic import TypeAdapter
+
+import app.schemas as schemas
+
+group_tree_adapter = TypeAdapter(List[schemas.PartialGroup])
+diagram_group_adapter = TypeAdapter(schemas.DiagramGroup)
+
+CatalogLoader = Callable[[], Awaitable[tuple[list[dict], dict[int, dict]]]]
+
+
+@dataclass
+class CatalogSnapshot:
+    version: int
+    tree_json: bytes
+    groups: dict[int, dict]
+    group_json: dict[int, bytes] = field(default_factory=dict)
+
+    def get_group_json(self, id: int) -> bytes | None:
+        if id not in self.group_json:
+            group = self.groups.get(id)
+            if group is None:
+                return None
+            self.group_json[id] = diagram_group_adapter.dump_json(
+                diagram_group_adapter.validate_python(group)
+            )
+        return self.group_json[id]
+
+
+class CatalogCache:
+    """In-process group -> diagram -> part graph with pre-encoded JSON.
+
+    Writers call invalidate() to bump the version, the next read rebuilds.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self._lock = threading.Lock()
+        self._build_lock = asyncio.Lock()
+        self._snapshot: CatalogSnapshot | None = None
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+
+    async def get(self, load: CatalogLoader) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self.version:
+            return snapshot
+
+        # One rebuild at a time, requests queued behind it reuse its snapshot
+        async with self._build_lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.version == self.version:
+                return snapshot
+
+            # Writes landing mid-build bump the version again and force a rebuild
+            version = self.version
+            tree, groups = await load()
+            snapshot = CatalogSnapshot(
+                version=version,
+                tree_json=group_tree_adapter.dump_json(
+                    group_tree_adapter.validate_python(tree)
+                ),
+                groups=groups,
+            )
+            self._snapshot = snapshot
+            return snapshot
+
+
+catalog_cache = CatalogCache()
@@ -0,0 +1,101 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Sequence, TypeVar
+from urllib.parse import urlsplit
+
+from app.config import settings
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+@dataclass
+class CrawlStats:
+    pages: int = 0
+    errors: int = 0
+    wall_time: float = 0.0
+
+    @property
+    def pages_per_sec(self) -> float:
+        if self.wall_time == 0:
+            return 0.0
+        return self.pages / self.wall_time
+
+    def __str__(self) -> str:
+        return (
+            f"{self.pages} pages ({self.errors} errors) in {self.wall_time:.1f}s, "
+            f"{self.pages_per_sec:.2f} pages/sec"
+        )
+
+
+class HostRateLimiter:
+    """Spaces requests to the same host by 1 / rate seconds plus jitter."""
+
+    def __init__(self, rate: float, jitter: float = 0.0):
+        self.interval = 1 / rate if rate > 0 else 0.0
+        self.jitter = jitter
+        self._next_slot: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def wait(self, host: str):
+        async with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = (
+                slot + self.interval + random.uniform(0, self.jitter)
+            )
+
+        await asyncio.sleep(slot - now)
+
+
+class CrawlScheduler:
+    def __init__(self, workers: int, rate: float, jitter: float = 0.0):
+        self.workers = workers
+        self.rate_limiter = HostRateLimiter(rate, jitter)
+
+    async def run(
+        self,
+        items: Sequence[T],
+        fetch: Callable[[T], Awaitable[R]],
+        url: Callable[[T], str],
+    ) -> tuple[list[R], CrawlStats]:
+        """Run `fetch` over `items` on parallel workers.
+
+        Results keep the order of `items`; items that raise are logged and
+        left out.
+        """
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(len(items)):
+            queue.put_nowait(i)
+
+        results: list[R | None] = [None] * len(items)
+        failed: set[int] = set()
+        stats = CrawlStats()
+
+        async def worker():
+            while not queue.empty():
+                i = queue.get_nowait()
+                item = items[i]
+                await self.rate_limiter.wait(urlsplit(url(item)).netloc)
+                try:
+                    results[i] = await fetch(item)
+                    stats.pages += 1
+                except Exception as e:
+                    failed.add(i)
+                    stats.errors += 1
+                    print(f"Error crawling {url(item)}: {str(e)}")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(self.workers, len(items)))))
+        stats.wall_time = time.perf_counter() - start
+
+        return [r for i, r in enumerate(results) if i not in failed], stats
+
+
+crawl_scheduler = CrawlScheduler(
+    workers=settings.crawl_workers,
+    rate=settings.crawl_rate_limit,
+    jitter=settings.crawl_jitter,
+)
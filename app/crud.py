@@ -1,156 +1,668 @@
-from typing import List
-
+import base64
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Iterator, List
+
+from sqlalchemy import Table, case, func, literal, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import app.models as models
 import app.schemas as schemas
+from app.autocomplete import part_autocomplete
+from app.catalog_cache import catalog_cache
+from app.config import settings
+from app.part_index import (
+    NAME_WEIGHT,
+    NUMBER_EXACT_SCORE,
+    NUMBER_PREFIX_SCORE,
+    IndexedPart,
+    tokenize,
+)
+from app.projection import Projection
 
-# GROUPS
+# PAGINATION
 
 
-def get_groups_nested(db: Session):
-    groups = db.query(models.Group).all()
+def encode_cursor(id: int) -> str:
+    return base64.urlsafe_b64encode(str(id).encode()).decode()
 
-    parent_groups: models.Group = []
-    for group in groups:
-        if len(group.parents) == 0:
-            parent_groups.append(group)
 
-    return parent_groups
+def decode_cursor(cursor: str) -> int:
+    # binascii.Error is a ValueError too
+    return int(base64.urlsafe_b64decode(cursor.encode()))
 
 
-def get_groups_flat(db: Session, page_length: int = 10, token: int = 0):
-    return db.query(models.Group).offset(token).limit(page_length).all()
+def _keyset_query(model, page_length: int, cursor: str | None = None):
+    # Fetch one extra row to know whether there is a next page
+    query = select(model).order_by(model.id).limit(page_length + 1)
+    if cursor is not None:
+        query = query.where(model.id > decode_cursor(cursor))
+    return query
 
 
-def get_group(db: Session, id: int):
-    return db.query(models.Group).get(id)
+def _keyset_page(rows, page_length: int) -> tuple[list, str | None]:
+    rows = list(rows)
+    if len(rows) <= page_length:
+        return rows, None
+    rows = rows[:page_length]
+    return rows, encode_cursor(rows[-1].id)
 
 
-def wipe_groups(db: Session):
-    db.query(models.Group).delete()
-    db.commit()
+# EXPORT
 
 
-def post_bulk_groups(db: Session, groups: List[schemas.CreateGroup]):
-    for new_group in groups:
-        # Add Group to DB if not already in
-        group = db.query(models.Group).get(new_group.id)
-        if group is None:
-            group = models.Group(
-                id=new_group.id,
-                name=new_group.name,
-                diagrams_url=new_group.diagrams_url,
-            )
-            db.add(group)
+async def stream_table_rows(
+    db: AsyncSession, table: Table, chunk_size: int
+) -> AsyncIterator[list[dict]]:
+    # Server-side cursor, only chunk_size rows are held at a time
+    query = (
+        select(table)
+        .order_by(*table.primary_key.columns)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(query)
+    async for rows in result.mappings().partitions():
+        yield [dict(row) for row in rows]
 
-        # Update parent - child relations if necessary
-        if new_group.parent_group_id is not None:
-            parent_group = db.query(models.Group).get(new_group.parent_group_id)
-            if group not in parent_group.children:
-                parent_group.children.append(group)
 
-        # Commit on each loop (not ACID) to speed up dev process
-        db.commit()
+# BULK WRITES
 
 
-# DIAGRAMS
+@dataclass
+class BulkWriteStats:
+    rows: int = 0
+    seconds: float = 0.0
 
+    @property
+    def rows_per_sec(self) -> float:
+        if self.seconds == 0:
+            return 0.0
+        return self.rows / self.seconds
 
-def get_diagrams(db: Session):
-    return db.query(models.Diagram).all()
+    def __str__(self) -> str:
+        return (
+            f"{self.rows} rows in {self.seconds:.2f}s, {self.rows_per_sec:.0f} rows/sec"
+        )
 
 
-def wipe_diagrams(db: Session):
-    db.query(models.Diagram).delete()
+def _insert(db: Session, table: Table):
+    # INSERT ... ON CONFLICT for Postgres, SQLite for tests and local dev
+    if db.get_bind().dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def _chunks(rows: list, size: int) -> Iterator[list]:
+    for i in range(0, len(rows), size):
+        yield rows[i : i + size]
+
+
+def _upsert(db: Session, table: Table, rows: list[dict], update: list[str]):
+    statement = _insert(db, table)
+    if update:
+        statement = statement.on_conflict_do_update(
+            index_elements=[column.name for column in table.primary_key],
+            set_={column: statement.excluded[column] for column in update},
+        )
+    else:
+        statement = statement.on_conflict_do_nothing()
+
+    for chunk in _chunks(rows, settings.bulk_chunk_size):
+        db.execute(statement, chunk)
+        if settings.bulk_commit_per_chunk:
+            db.commit()
+
+
+# GROUPS
+
+
+def _group_tree_query():
+    # Each group with its parent id, a group with several parents repeats
+    parents = models.group_group_association_table
+    return (
+        select(
+            models.Group.id,
+            models.Group.name,
+            models.Group.diagrams_url,
+            parents.c.parent_group_id,
+        )
+        .outerjoin(parents, parents.c.child_group_id == models.Group.id)
+        .order_by(models.Group.id)
+    )
+
+
+def _build_group_tree(rows) -> list[dict]:
+    nodes: dict[int, dict] = {}
+    for id, name, diagrams_url, _ in rows:
+        if id not in nodes:
+            nodes[id] = {
+                "id": id,
+                "name": name,
+                "diagrams_url": diagrams_url,
+                "children": [],
+            }
+
+    child_ids: set[int] = set()
+    for id, _, _, parent_id in rows:
+        if parent_id is not None:
+            nodes[parent_id]["children"].append(nodes[id])
+            child_ids.add(id)
+
+    return [node for id, node in nodes.items() if id not in child_ids]
+
+
+async def get_groups_flat_async(
+    db: AsyncSession, page_length: int = 10, cursor: str | None = None
+):
+    result = await db.execute(_keyset_query(models.Group, page_length, cursor))
+    return _keyset_page(result.scalars(), page_length)
+
+
+def get_diagram_groups(db: Session):
+    return (
+        db.query(models.Group)
+        .filter(models.Group.diagrams_url.is_not(None))
+        .order_by(models.Group.id)
+        .all()
+    )
+
+
+# Whole catalog as the group tree plus group id => group with diagrams and parts
+async def get_catalog_async(db: AsyncSession) -> tuple[list[dict], dict[int, dict]]:
+    rows = (await db.execute(_group_tree_query())).all()
+    tree = _build_group_tree(rows)
+
+    groups: dict[int, dict] = {}
+    for id, name, diagrams_url, _ in rows:
+        groups[id] = {
+            "id": id,
+            "name": name,
+            "diagrams_url": diagrams_url,
+            "diagrams": [],
+        }
+
+    group_diagrams = models.group_diagram_association_table
+    diagram_rows = await db.execute(
+        select(
+            group_diagrams.c.group_id,
+            models.Diagram.id,
+            models.Diagram.name,
+            models.Diagram.img_url,
+        )
+        .join(models.Diagram, models.Diagram.id == group_diagrams.c.diagram_id)
+        .order_by(models.Diagram.id)
+    )
+    diagrams: dict[int, dict] = {}
+    for group_id, id, name, img_url in diagram_rows:
+        if id not in diagrams:
+            diagrams[id] = {"id": id, "name": name, "img_url": img_url, "parts": []}
+        groups[group_id]["diagrams"].append(diagrams[id])
+
+    diagram_parts = models.diagram_part_association_table
+    part_rows = await db.execute(
+        select(
+            diagram_parts.c.diagram_id,
+            models.Part.number,
+            models.Part.note,
+            models.Part.name,
+            models.Part.date_range,
+        )
+        .join(models.Part, models.Part.id == diagram_parts.c.part_id)
+        .order_by(models.Part.id)
+    )
+    for diagram_id, number, note, name, date_range in part_rows:
+        diagrams[diagram_id]["parts"].append(
+            {"number": number, "note": note, "name": name, "date_range": date_range}
+        )
+
+    return tree, groups
+
+
+def wipe_groups(db: Session):
+    db.query(models.Group).delete()
+    db.commit()
+    catalog_cache.invalidate()
+
+
+def post_bulk_groups(db: Session, groups: List[schemas.CreateGroup]) -> BulkWriteStats:
+    start = time.perf_counter()
+
+    group_rows = {
+        group.id: {
+            "id": group.id,
+            "name": group.name,
+            "diagrams_url": group.diagrams_url,
+        }
+        for group in groups
+    }
+    relation_rows = {
+        (group.parent_group_id, group.id)
+        for group in groups
+        if group.parent_group_id is not None
+    }
+
+    _upsert(
+        db,
+        models.Group.__table__,
+        list(group_rows.values()),
+        update=["name", "diagrams_url"],
+    )
+    _upsert(
+        db,
+        models.group_group_association_table,
+        [
+            {"parent_group_id": parent_id, "child_group_id": child_id}
+            for parent_id, child_id in relation_rows
+        ],
+        update=[],
+    )
     db.commit()
+    catalog_cache.invalidate()
 
+    return BulkWriteStats(rows=len(groups), seconds=time.perf_counter() - start)
 
-def post_bulk_diagrams(db: Session, diagrams: List[schemas.CreateDiagram]):
-    for new_diagram in diagrams:
-        # Add Diagram to DB if not already in
-        diagram = db.query(models.Diagram).get(new_diagram.id)
-        if diagram is None:
-            diagram = models.Diagram(
-                id=new_diagram.id,
-                name=new_diagram.name,
-                img_url=new_diagram.img_url,
-            )
-            db.add(diagram)
 
-        # Update parent - child relations if necessary
-        parent_group = db.query(models.Group).get(new_diagram.parent_group_id)
-        if diagram not in parent_group.diagrams:
-            parent_group.diagrams.append(diagram)
+# DIAGRAMS
+
 
-        # Commit on each loop (not ACID) to speed up dev process
-        db.commit()
+async def get_diagrams_async(
+    db: AsyncSession,
+    page_length: int = 10,
+    cursor: str | None = None,
+    projection: Projection | None = None,
+):
+    query = _keyset_query(models.Diagram, page_length, cursor)
+    if projection is not None:
+        query = query.options(*projection.options())
+    result = await db.execute(query)
+    return _keyset_page(result.scalars(), page_length)
+
+
+def wipe_diagrams(db: Session):
+    db.query(models.Diagram).delete()
+    db.commit()
+    catalog_cache.invalidate()
+
+
+def post_bulk_diagrams(
+    db: Session, diagrams: List[schemas.CreateDiagram]
+) -> BulkWriteStats:
+    rows = [
+        schemas.DiagramRow(
+            id=diagram.id,
+            name=diagram.name,
+            img_url=diagram.img_url,
+            parent_group_id=diagram.parent_group_id,
+        )
+        for diagram in diagrams
+    ]
+    return post_bulk_diagram_rows(db, rows)
+
+
+def post_bulk_diagram_rows(
+    db: Session, diagrams: List[schemas.DiagramRow]
+) -> BulkWriteStats:
+    start = time.perf_counter()
+
+    diagram_rows = {
+        diagram.id: {"id": diagram.id, "name": diagram.name, "img_url": diagram.img_url}
+        for diagram in diagrams
+    }
+    relation_rows = {(diagram.parent_group_id, diagram.id) for diagram in diagrams}
+
+    _upsert(
+        db,
+        models.Diagram.__table__,
+        list(diagram_rows.values()),
+        update=["name", "img_url"],
+    )
+    _upsert(
+        db,
+        models.group_diagram_association_table,
+        [
+            {"group_id": group_id, "diagram_id": diagram_id}
+            for group_id, diagram_id in relation_rows
+        ],
+        update=[],
+    )
+    db.commit()
+    catalog_cache.invalidate()
+
+    return BulkWriteStats(rows=len(diagrams), seconds=time.perf_counter() - start)
 
 
 # PARTS
 
 
-def get_parts(db: Session, page_length: int = 10, token: int = 0):
-    return db.query(models.Part).offset(token).limit(page_length).all()
+async def get_parts_async(
+    db: AsyncSession,
+    page_length: int = 10,
+    cursor: str | None = None,
+    projection: Projection | None = None,
+):
+    query = _keyset_query(models.Part, page_length, cursor)
+    if projection is not None:
+        query = query.options(*projection.options())
+    result = await db.execute(query)
+    return _keyset_page(result.scalars(), page_length)
+
+
+async def get_indexed_parts_async(db: AsyncSession) -> list[IndexedPart]:
+    part = models.Part
+    result = await db.execute(
+        select(part.id, part.number, part.note, part.name, part.date_range)
+    )
+    return [IndexedPart(*row) for row in result]
+
+
+async def search_parts_async(db: AsyncSession, q: str, limit: int):
+    # Postgres: number prefix, full text on name/note by word prefix and
+    # trigram similarity on name for typos
+    part = models.Part
+    number = models.normalize_part_number(q)
+    tokens = tokenize(q)
+    # Whitespace-only q, an empty prefix would match every part
+    if not number and not tokens:
+        return []
+    document = models.part_search_document()
+
+    matches = [part.number.startswith(number, autoescape=True)]
+    rank = case((part.number == number, NUMBER_EXACT_SCORE), else_=0) + case(
+        (part.number.startswith(number, autoescape=True), NUMBER_PREFIX_SCORE),
+        else_=0,
+    )
+    if tokens:
+        tsquery = func.to_tsquery(
+            literal("simple", literal_execute=True),
+            " & ".join(f"{token}:*" for token in tokens),
+        )
+        matches.append(document.op("@@")(tsquery))
+        rank = rank + func.ts_rank(document, tsquery) * NAME_WEIGHT * 2
+    matches.append(part.name.op("%")(q))
+    rank = rank + func.similarity(part.name, q) * NAME_WEIGHT
+
+    query = (
+        select(
+            part.id,
+            part.number,
+            part.note,
+            part.name,
+            part.date_range,
+            rank.label("score"),
+        )
+        .where(or_(*matches))
+        .order_by(rank.desc(), part.number)
+        .limit(limit)
+    )
+    return (await db.execute(query)).all()
 
 
 def wipe_parts(db: Session):
     db.query(models.Part).delete()
     db.commit()
+    catalog_cache.invalidate()
+    part_autocomplete.clear()
+
+
+def post_bulk_parts(db: Session, parts: List[schemas.CreatePart]) -> BulkWriteStats:
+    rows = [
+        schemas.PartRow(
+            number=part.number,
+            note=part.note,
+            name=part.name,
+            date_range=part.date_range,
+            parent_diagram_id=part.parent_diagram_id,
+        )
+        for part in parts
+    ]
+    return post_bulk_part_rows(db, rows)
+
+
+def post_bulk_part_rows(db: Session, parts: List[schemas.PartRow]) -> BulkWriteStats:
+    start = time.perf_counter()
+
+    # number => id, filled one indexed lookup per chunk
+    part_ids: dict[str, int] = {}
+    completions: list[tuple[str, str]] = []
+    for chunk in _chunks(parts, settings.bulk_chunk_size):
+        new_parts: dict[str, dict] = {}
+        relation_rows: set[tuple[int, str]] = set()
+        for part in chunk:
+            number = models.normalize_part_number(part.number)
+            relation_rows.add((part.parent_diagram_id, number))
+            if number not in part_ids and number not in new_parts:
+                new_parts[number] = {
+                    "number": number,
+                    "note": part.note,
+                    "name": part.name,
+                    "date_range": part.date_range,
+                }
+
+        if new_parts:
+            completions.extend((p["number"], p["name"]) for p in new_parts.values())
+            # The unique index settles existing and concurrently inserted parts
+            _upsert(db, models.Part.__table__, list(new_parts.values()), update=[])
+            part_ids.update(
+                db.execute(
+                    select(models.Part.number, models.Part.id).where(
+                        models.Part.number.in_(new_parts.keys())
+                    )
+                ).all()
+            )
 
+        _upsert(
+            db,
+            models.diagram_part_association_table,
+            [
+                {"diagram_id": diagram_id, "part_id": part_ids[number]}
+                for diagram_id, number in relation_rows
+            ],
+            update=[],
+        )
+        if settings.bulk_commit_per_chunk:
+            db.commit()
 
-def post_bulk_parts(db: Session, parts: List[schemas.CreatePart]):
-    for new_part in parts:
-        # Add Diagram to DB if not already in
-        part = db.query(models.Part).filter(models.Part.number == new_part.number).all()
-        if part is None or len(part) == 0:
-            part = models.Part(
-                number=new_part.number,
-                # amount=part.amount,
-                note=new_part.note,
-                name=new_part.name,
-                date_range=new_part.date_range,
-            )
-            db.add(part)
-        else:
-            part = part[0]
+    db.commit()
+    catalog_cache.invalidate()
+    part_autocomplete.add(completions)
 
-        # Update parent - child relations if necessary
-        parent_diagram = db.query(models.Diagram).get(new_part.parent_diagram_id)
-        if part not in parent_diagram.parts:
-            parent_diagram.parts.append(part)
+    return BulkWriteStats(rows=len(parts), seconds=time.perf_counter() - start)
 
-        # Commit on each loop (not ACID) to speed up dev process
-        db.commit()
+
+def get_part_completions(db: Session) -> list[tuple[str, str]]:
+    return db.execute(select(models.Part.number, models.Part.name)).all()
 
 
 # SCRAPING
 
 
-def get_urls(db: Session):
-    pages = db.query(models.PartsSouqPageData).all()
-    return pages
+def get_group_pages(
+    db: Session,
+    page_length: int,
+    after_id: int | None = None,
+    changed_only: bool = False,
+) -> list[tuple[int, bytes | str]]:
+    # Cached pages of groups that have diagrams, keyset paged by group id.
+    # Pages come back gzipped (legacy rows as plain html) for the parser.
+    page = models.PartsSouqPageData
+    query = (
+        select(page.id, models.PartsSouqPageBlob.data, page.html_string)
+        .join(models.Group, models.Group.id == page.id)
+        .outerjoin(models.PartsSouqPageBlob)
+        .where(models.Group.diagrams_url.is_not(None))
+        .order_by(page.id)
+        .limit(page_length)
+    )
+    if after_id is not None:
+        query = query.where(page.id > after_id)
+    if changed_only:
+        # Content not parsed since it was last fetched, legacy rows have no
+        # content_hash and drop out once they have a parsed_hash
+        query = query.where(
+            or_(page.parsed_hash.is_(None), page.parsed_hash != page.content_hash)
+        )
+    return [
+        (id, data if data is not None else html_string)
+        for id, data, html_string in db.execute(query)
+    ]
+
+
+def get_stale_groups(
+    db: Session, max_age: timedelta | None = None
+) -> list[models.Group]:
+    # Groups with diagrams whose page was never cached, or, given max_age,
+    # was fetched longer ago than that
+    page = models.PartsSouqPageData
+    stale = page.id.is_(None)
+    if max_age is not None:
+        cutoff = datetime.now(timezone.utc) - max_age
+        stale = or_(stale, page.fetched_at.is_(None), page.fetched_at < cutoff)
+    query = (
+        select(models.Group)
+        .outerjoin(page, page.id == models.Group.id)
+        .where(models.Group.diagrams_url.is_not(None), stale)
+        .order_by(models.Group.id)
+    )
+    return db.scalars(query).all()
+
+
+def mark_pages_parsed(db: Session, ids: list[int]):
+    page = models.PartsSouqPageData
+    for chunk in _chunks(ids, settings.bulk_chunk_size):
+        db.execute(
+            update(page)
+            .where(page.id.in_(chunk), page.content_hash.is_not(None))
+            .values(parsed_hash=page.content_hash)
+        )
+        # Legacy rows hold the full page, compaction and re-scrapes store only
+        # its diagram fragment, so stamp them with the fragment's hash
+        legacy_pages = db.execute(
+            select(page.id, page.html_string).where(
+                page.id.in_(chunk),
+                page.content_hash.is_(None),
+                page.html_string.is_not(None),
+            )
+        ).all()
+        if legacy_pages:
+            # bs4 stays out of API-only imports
+            from app.parsers import extract_diagram_fragment
+
+            db.execute(
+                update(page),
+                [
+                    {
+                        "id": id,
+                        "parsed_hash": models.page_hash(
+                            extract_diagram_fragment(html_string)
+                        ),
+                    }
+                    for id, html_string in legacy_pages
+                ],
+            )
+    db.commit()
+
 
+def get_legacy_pages(db: Session, page_length: int) -> list[tuple[int, str, str]]:
+    page = models.PartsSouqPageData
+    query = (
+        select(page.id, page.url, page.html_string)
+        .where(page.content_hash.is_(None), page.html_string.is_not(None))
+        .order_by(page.id)
+        .limit(page_length)
+    )
+    return db.execute(query).all()
+
+
+def get_page_cache_stats(db: Session) -> dict:
+    page = models.PartsSouqPageData
+    blob = models.PartsSouqPageBlob
+    pages, legacy_pages, legacy_bytes = db.execute(
+        select(
+            func.count(page.id),
+            func.count(page.html_string),
+            func.coalesce(func.sum(func.length(page.html_string)), 0),
+        )
+    ).one()
+    blobs, compressed_bytes, raw_bytes = db.execute(
+        select(
+            func.count(blob.hash),
+            func.coalesce(func.sum(func.length(blob.data)), 0),
+            func.coalesce(func.sum(blob.size), 0),
+        )
+    ).one()
+    return {
+        "pages": pages,
+        "blobs": blobs,
+        "compressed_bytes": compressed_bytes,
+        "raw_bytes": raw_bytes,
+        "legacy_pages": legacy_pages,
+        "legacy_bytes": legacy_bytes,
+    }
+
+
+def prune_page_blobs(db: Session) -> int:
+    # Blobs no page points at any more
+    used = select(models.PartsSouqPageData.content_hash).where(
+        models.PartsSouqPageData.content_hash.is_not(None)
+    )
+    result = db.execute(
+        models.PartsSouqPageBlob.__table__.delete().where(
+            models.PartsSouqPageBlob.hash.not_in(used)
+        )
+    )
+    db.commit()
+    return result.rowcount
 
-def get_group_url_html(db: Session, group_id: int) -> models.PartsSouqPageData | None:
-    url = db.query(models.PartsSouqPageData).get(group_id)
-    return url
 
+def post_html_url(db: Session, new_page: schemas.CreatePartsSouqPageData) -> bool:
+    """Store the page content compressed under its hash.
 
-def post_html_url(db: Session, new_page: schemas.CreatePartsSouqPageData):
-    # Add Diagram to DB if not already in
+    Returns whether the stored content changed.
+    """
+    content_hash = models.page_hash(new_page.html_string)
+    fetched_at = datetime.now(timezone.utc)
     page = db.query(models.PartsSouqPageData).get(new_page.id)
+    if page is not None and page.content_hash == content_hash:
+        page.fetched_at = fetched_at
+        db.commit()
+        return False
+
+    # Identical content is stored once
+    blob = _insert(db, models.PartsSouqPageBlob.__table__).on_conflict_do_nothing()
+    db.execute(
+        blob,
+        {
+            "hash": content_hash,
+            "data": models.compress_page(new_page.html_string),
+            "size": len(new_page.html_string.encode()),
+        },
+    )
+
     if page is None:
-        page = models.PartsSouqPageData(
-            id=new_page.id,
-            url=new_page.url,
-            html_string=new_page.html_string,
-        )
+        page = models.PartsSouqPageData(id=new_page.id)
         db.add(page)
-    else:
-        db.query(models.PartsSouqPageData).where(
-            models.PartsSouqPageData.id == new_page.id
-        ).update({models.PartsSouqPageData.html_string: new_page.html_string})
+    page.url = new_page.url
+    page.content_hash = content_hash
+    page.fetched_at = fetched_at
+    page.html_string = None
+
+    db.commit()
+    return True
+
+
+def get_search_results(db: Session, limit: int) -> list[models.PartSearchResult]:
+    query = (
+        select(models.PartSearchResult)
+        .order_by(models.PartSearchResult.fetched_at.desc())
+        .limit(limit)
+    )
+    return db.scalars(query).all()
+
 
-    # Commit on each loop (not ACID) to speed up dev process
+def post_search_result(db: Session, number: str, results: list[dict], fetched_at):
+    row = {"number": number, "results": results, "fetched_at": fetched_at}
+    _upsert(db, models.PartSearchResult.__table__, [row], ["results", "fetched_at"])
     db.commit()
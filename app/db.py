@@ -1,11 +1,156 @@
-from sqlalchemy import create_engine
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from app.config import settings
 
-engine = create_engine(settings.sqlalchemy_string)
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_url(url: str) -> URL:
+    sync_url = make_url(url)
+    backend = sync_url.get_backend_name()
+    return sync_url.set(drivername=ASYNC_DRIVERS.get(backend, sync_url.drivername))
+
+
+class PoolMetrics:
+    """Time spent waiting for a pooled connection, per engine."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def record(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.checkouts += 1
+            self.timeouts += timed_out
+            self.wait_seconds += seconds
+            self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+
+    def stats(self) -> dict:
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.wait_seconds / (self.checkouts or 1) * 1e3, 3),
+            "max_wait_ms": round(self.max_wait_seconds * 1e3, 3),
+        }
+
+
+pool_metrics: dict[str, PoolMetrics] = {}
+
+
+class TimedPoolMixin:
+    metrics: PoolMetrics
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            # Pool exhausted for pool_timeout, connect errors aren't waits
+            self.metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str | URL, name: str, is_async: bool = False) -> dict:
+    url = make_url(url)
+    metrics = pool_metrics.setdefault(name, PoolMetrics())
+    pool_class = TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool
+    options = {
+        # A subclass per engine, pools are recreated from their class on dispose
+        "poolclass": type(pool_class.__name__, (pool_class,), {"metrics": metrics}),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    timeout = settings.db_statement_timeout_ms
+    if timeout is not None and url.get_backend_name() == "postgresql":
+        if is_async:
+            options["connect_args"] = {
+                "server_settings": {"statement_timeout": str(timeout)}
+            }
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+async_url = settings.async_sqlalchemy_string or get_async_url(
+    settings.sqlalchemy_string
+)
+engine = create_engine(
+    settings.sqlalchemy_string, **engine_options(settings.sqlalchemy_string, "primary")
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    async_url, **engine_options(async_url, "primary_async", is_async=True)
+)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Read-only queries go to the replica when one is configured
+ENGINES = {"primary": engine, "primary_async": async_engine.sync_engine}
+if settings.read_replica_string is not None:
+    async_read_url = settings.async_read_replica_string or get_async_url(
+        settings.read_replica_string
+    )
+    read_engine = create_engine(
+        settings.read_replica_string,
+        **engine_options(settings.read_replica_string, "replica"),
+    )
+    async_read_engine = create_async_engine(
+        async_read_url, **engine_options(async_read_url, "replica_async", is_async=True)
+    )
+    ENGINES.update(replica=read_engine, replica_async=async_read_engine.sync_engine)
+else:
+    read_engine = engine
+    async_read_engine = async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    bind=async_read_engine, autoflush=False, expire_on_commit=False
+)
+
+
+def get_pool_stats() -> dict:
+    stats = {name: metrics.stats() for name, metrics in pool_metrics.items()}
+    for name, pool_engine in ENGINES.items():
+        pool = pool_engine.pool
+        stats[name]["checked_out"] = pool.checkedout()
+        stats[name]["size"] = pool.size()
+        stats[name]["overflow"] = pool.overflow()
+    return stats
+
+
+async def dispose_engines():
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
 
 class Base(DeclarativeBase):
     pass
@@ -18,3 +163,21 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db():
+    async with AsyncReadSessionLocal() as db:
+        yield db
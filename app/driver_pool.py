@@ -0,0 +1,153 @@
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from queue import Empty, LifoQueue
+from typing import TYPE_CHECKING, Callable, Iterator
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from seleniumbase import Driver
+
+
+@dataclass
+class PooledDriver:
+    driver: "Driver"
+    reconnect_time: int
+    pages: int = 0
+
+    def get_page_source(self, url: str) -> str:
+        # Only a fresh session has to get past the PartsSouq challenge
+        if self.pages == 0:
+            self.driver.uc_open_with_reconnect(url, reconnect_time=self.reconnect_time)
+        else:
+            self.driver.uc_open(url)
+        self.pages += 1
+        return self.driver.page_source
+
+    def get_session(self) -> tuple[dict[str, str], str]:
+        # Cookies and user agent that got past the challenge, for plain HTTP
+        cookies = {c["name"]: c["value"] for c in self.driver.get_cookies()}
+        user_agent = self.driver.execute_script("return navigator.userAgent;")
+        return cookies, user_agent
+
+    def is_healthy(self) -> bool:
+        try:
+            self.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+class DriverPool:
+    """Long-lived UC Chrome sessions leased out to the scrapers.
+
+    Drivers are created lazily up to `size`, health checked on lease and
+    recycled once they have loaded `max_pages` pages.
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_pages: int,
+        headless: bool = True,
+        reconnect_time: int = 4,
+        driver_factory: Callable[[], "Driver"] | None = None,
+    ):
+        self.size = size
+        self.max_pages = max_pages
+        self.headless = headless
+        self.reconnect_time = reconnect_time
+        self.driver_factory = driver_factory or self._uc_driver
+
+        self._idle: LifoQueue[PooledDriver] = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._running = False
+
+    def start(self):
+        self._running = True
+
+    def shutdown(self):
+        # Leased drivers are quit when they are returned
+        self._running = False
+        while True:
+            try:
+                self._idle.get_nowait().quit()
+            except Empty:
+                break
+
+    @contextmanager
+    def lease(self) -> Iterator[PooledDriver]:
+        if not self._running:
+            raise RuntimeError("Driver pool is not running")
+
+        self._slots.acquire()
+        # shutdown() may have run while this caller waited for a slot
+        if not self._running:
+            self._slots.release()
+            raise RuntimeError("Driver pool is not running")
+        pooled = None
+        try:
+            pooled = self._checkout()
+            yield pooled
+        except BaseException:
+            # Don't hand a driver in an unknown state to the next caller
+            if pooled is not None:
+                pooled.quit()
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                self._checkin(pooled)
+            self._slots.release()
+
+    def fetch(self, url: str) -> str:
+        with self.lease() as pooled:
+            return pooled.get_page_source(url)
+
+    def fetch_with_session(self, url: str) -> tuple[str, dict[str, str], str]:
+        with self.lease() as pooled:
+            page_source = pooled.get_page_source(url)
+            return (page_source, *pooled.get_session())
+
+    def _checkout(self) -> PooledDriver:
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except Empty:
+                return self._new_driver()
+
+            if pooled.is_healthy():
+                return pooled
+            pooled.quit()
+
+    def _checkin(self, pooled: PooledDriver):
+        if not self._running or pooled.pages >= self.max_pages:
+            pooled.quit()
+        else:
+            self._idle.put(pooled)
+
+    def _new_driver(self) -> PooledDriver:
+        return PooledDriver(
+            driver=self.driver_factory(), reconnect_time=self.reconnect_time
+        )
+
+    def _uc_driver(self) -> "Driver":
+        # seleniumbase is slow to import, only pay for it once a browser is needed
+        from seleniumbase import Driver
+
+        return Driver(uc=True, headless=self.headless)
+
+
+driver_pool = DriverPool(
+    size=settings.driver_pool_size,
+    max_pages=settings.driver_max_pages,
+    headless=settings.driver_headless,
+    reconnect_time=settings.driver_reconnect_time,
+)
@@ -0,0 +1,57 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from app.config import settings
+
+R = TypeVar("R")
+
+
+class Executors:
+    """Size-limited executors that keep blocking work off the event loop."""
+
+    def __init__(self, scrape_workers: int, parse_workers: int):
+        self.scrape_workers = scrape_workers
+        self.parse_workers = parse_workers
+        self.scrape: Executor | None = None
+        self.parse: Executor | None = None
+
+    def start(self):
+        # Selenium page loads block on I/O, threads are enough
+        self.scrape = ThreadPoolExecutor(
+            max_workers=self.scrape_workers, thread_name_prefix="scrape"
+        )
+        # BeautifulSoup parsing is CPU bound, spawn so children don't inherit
+        # the pooled drivers
+        self.parse = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def shutdown(self):
+        for executor in (self.scrape, self.parse):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self.scrape = self.parse = None
+
+
+executors = Executors(
+    scrape_workers=settings.scrape_workers,
+    parse_workers=settings.parse_workers,
+)
+
+
+async def _run(executor: Executor | None, fn: Callable[..., R], *args) -> R:
+    if executor is None:
+        raise RuntimeError("Executors are not running")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, fn, *args)
+
+
+async def run_scrape(fn: Callable[..., R], *args) -> R:
+    return await _run(executors.scrape, fn, *args)
+
+
+async def run_parse(fn: Callable[..., R], *args) -> R:
+    return await _run(executors.parse, fn, *args)
@@ -0,0 +1,111 @@
+import asyncio
+
+import httpx
+
+from app.config import settings
+from app.driver_pool import DriverPool, driver_pool
+from app.executors import run_scrape
+
+# Signals of the Cloudflare interstitial in front of PartsSouq. Ordinary pages
+# also load /cdn-cgi/challenge-platform/ scripts, so that path isn't one.
+CHALLENGE_MARKERS = (
+    "<title>Just a moment...</title>",
+    "_cf_chl_opt",
+)
+
+
+def is_challenge(response: httpx.Response) -> bool:
+    if response.headers.get("cf-mitigated") == "challenge":
+        return True
+    return any(marker in response.text for marker in CHALLENGE_MARKERS)
+
+
+class PageFetcher:
+    """Fetch pages over pooled keep-alive HTTP with a browser's session.
+
+    The first fetch, and any fetch that lands on the challenge page, goes
+    through the driver pool. The cookies and user agent of that browser
+    session are then reused for plain HTTP requests.
+    """
+
+    def __init__(
+        self,
+        pool: DriverPool,
+        enabled: bool = True,
+        timeout: float = 15,
+        max_connections: int = 10,
+    ):
+        self.pool = pool
+        self.enabled = enabled
+        self.timeout = timeout
+        self.max_connections = max_connections
+
+        self.client: httpx.AsyncClient | None = None
+        # Bumped whenever the browser hands over new cookies, 0 is none yet
+        self._session = 0
+        self._solve_lock = asyncio.Lock()
+        self.http_pages = 0
+        self.browser_pages = 0
+
+    async def start(self):
+        self.client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+            ),
+        )
+
+    async def shutdown(self):
+        if self.client is not None:
+            await self.client.aclose()
+        self.client = None
+        self._session = 0
+
+    async def fetch(self, url: str) -> str:
+        if not self.enabled or self.client is None:
+            return await run_scrape(self.pool.fetch, url)
+
+        session = self._session
+        if session > 0:
+            page_source = await self._fetch_with_http(url)
+            if page_source is not None:
+                return page_source
+
+        # One browser solve at a time, whoever waited reuses the new session
+        async with self._solve_lock:
+            if self._session != session:
+                page_source = await self._fetch_with_http(url)
+                if page_source is not None:
+                    return page_source
+            return await self._fetch_with_browser(url)
+
+    async def _fetch_with_http(self, url: str) -> str | None:
+        response = await self.client.get(url)
+        if is_challenge(response):
+            print(f"Challenge on {url}, falling back to the browser")
+            return None
+        response.raise_for_status()
+        self.http_pages += 1
+        return response.text
+
+    async def _fetch_with_browser(self, url: str) -> str:
+        page_source, cookies, user_agent = await run_scrape(
+            self.pool.fetch_with_session, url
+        )
+        self.client.cookies.clear()
+        for name, value in cookies.items():
+            self.client.cookies.set(name, value)
+        self.client.headers["User-Agent"] = user_agent
+        self._session += 1
+        self.browser_pages += 1
+        return page_source
+
+
+page_fetcher = PageFetcher(
+    driver_pool,
+    enabled=settings.http_fetch,
+    timeout=settings.http_timeout,
+    max_connections=settings.http_max_connections,
+)
@@ -8,6 +8,11 @@
 # Install all packages: pip install -r requirements.txt
 # Update requirements.txt: pip freeze > requirements.txt
 
+# DATABASE
+# Create tables: python -m app.manage create-schema
+# Upgrade an existing database: python -m app.manage migrate
+# Check startup budget: python -m app.manage check-startup
+
 # FAST API
 # Run server: fastapi dev main.py
 # localhost: http://127.0.0.1:8000
@@ -16,22 +21,68 @@
 # JSON schema: http://127.0.0.1:8000/openapi.json
 
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-
-import app.models as models
-from app.db import engine
-
-from .routers import diagrams, groups, parts, souq_scraper, souq_scraper_v2
+from starlette.concurrency import run_in_threadpool
+
+import app.crud as crud
+from app.autocomplete import part_autocomplete
+from app.config import settings
+from app.db import SessionLocal, dispose_engines, get_pool_stats
+
+from .routers import diagrams, export, groups, parts
+
+# The scraper stack (selenium, httpx, bs4, process pool) is only imported on
+# deployments that serve the scraping routes
+if settings.enable_scrapers:
+    from app.driver_pool import driver_pool
+    from app.executors import executors
+    from app.fetcher import page_fetcher
+    from app.search_cache import search_cache
+    from app.singleflight import scrape_flight
+
+    from .routers import (
+        diagrams_scraper,
+        groups_scraper,
+        souq_scraper,
+        souq_scraper_v2,
+    )
+
+
+def load_part_autocomplete():
+    try:
+        with SessionLocal() as db:
+            part_autocomplete.build(crud.get_part_completions(db))
+    except Exception as e:
+        print(f"Error building part autocomplete: {str(e)}")
+        return
+    print(f"Built part autocomplete: {part_autocomplete.stats()}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # create DB and tables
-    models.Base.metadata.create_all(bind=engine)
-    yield
+    # Tables come from `python -m app.manage create-schema`, not from startup.
+    # Autocomplete builds in the background so it doesn't hold up serving.
+    autocomplete = asyncio.create_task(run_in_threadpool(load_part_autocomplete))
+    if settings.enable_scrapers:
+        executors.start()
+        driver_pool.start()
+        await page_fetcher.start()
+        await run_in_threadpool(search_cache.load)
+    try:
+        yield
+    finally:
+        # aiosqlite's worker threads keep the process alive until disposed
+        if settings.enable_scrapers:
+            await search_cache.shutdown()
+            await page_fetcher.shutdown()
+            driver_pool.shutdown()
+            executors.shutdown()
+        await autocomplete
+        await dispose_engines()
 
 
 app = FastAPI(
@@ -62,8 +113,25 @@ async def hello_world() -> str:
     return "Hello World"
 
 
+@app.get("/metrics")
+async def get_metrics() -> dict:
+    metrics = {"db": get_pool_stats()}
+    if settings.enable_scrapers:
+        metrics["scrape_flight"] = scrape_flight.stats()
+        metrics["search_cache"] = search_cache.stats()
+        metrics["fetcher"] = {
+            "http_pages": page_fetcher.http_pages,
+            "browser_pages": page_fetcher.browser_pages,
+        }
+    return metrics
+
+
 app.include_router(groups.router)
 app.include_router(diagrams.router)
 app.include_router(parts.router)
-app.include_router(souq_scraper.router)
-app.include_router(souq_scraper_v2.router)
+app.include_router(export.router)
+if settings.enable_scrapers:
+    app.include_router(groups_scraper.router)
+    app.include_router(diagrams_scraper.router)
+    app.include_router(souq_scraper.router)
+    app.include_router(souq_scraper_v2.router)
@@ -0,0 +1,135 @@
+# Maintenance commands
+# Create tables: python -m app.manage create-schema
+# Upgrade an existing database: python -m app.manage migrate
+# Check startup budget: python -m app.manage check-startup
+# Export snapshot: python -m app.manage export-snapshot catalog.msgpack.gz [--pages]
+# Import snapshot: python -m app.manage import-snapshot catalog.msgpack.gz
+
+import argparse
+import json
+import subprocess
+import sys
+
+from app.config import settings
+from app.db import SessionLocal, engine
+
+# Run in a fresh interpreter so modules already imported here don't count
+STARTUP_PROBE = """
+import asyncio, json, time
+
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+import httpx
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        start = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            response = await client.get("/groups/")
+        response.raise_for_status()
+        return time.perf_counter() - start
+
+first = asyncio.run(first_request())
+print(json.dumps({"import_ms": (imported - start) * 1e3, "first_request_ms": first * 1e3}))
+"""
+
+
+def create_schema():
+    import app.models as models
+
+    models.Base.metadata.create_all(bind=engine)
+    print(f"Created tables on {engine.url.render_as_string()}")
+
+
+def measure_startup() -> dict[str, float]:
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_PROBE],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=120,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def check_startup() -> bool:
+    timings = measure_startup()
+    budgets = {
+        "import_ms": settings.startup_import_budget_ms,
+        "first_request_ms": settings.startup_first_request_budget_ms,
+    }
+    ok = True
+    for name, budget in budgets.items():
+        within = timings[name] <= budget
+        ok = ok and within
+        print(
+            f"{name}: {timings[name]:.1f} / {budget:.0f}"
+            f" {'ok' if within else 'OVER BUDGET'}"
+        )
+    return ok
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m app.manage")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser(
+        "export-snapshot", help="Write the catalog to a msgpack snapshot"
+    )
+    export_parser.add_argument("path", help="Output file, gzipped if it ends in .gz")
+    export_parser.add_argument(
+        "--pages", action="store_true", help="Include the cached PartsSouq pages"
+    )
+
+    import_parser = commands.add_parser(
+        "import-snapshot", help="Replace the catalog with a snapshot"
+    )
+    import_parser.add_argument("path")
+
+    commands.add_parser("create-schema", help="Create any missing tables")
+    commands.add_parser(
+        "migrate", help="Add the columns and indexes older databases are missing"
+    )
+    commands.add_parser(
+        "check-startup",
+        help="Time importing the app and its first request against the budget",
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "create-schema":
+        create_schema()
+        return
+    if args.command == "migrate":
+        from app.migrate import MigrationError, migrate
+
+        try:
+            migrate(engine)
+        except MigrationError as e:
+            sys.exit(f"Migration failed: {e}")
+        print("Database is up to date")
+        return
+    if args.command == "check-startup":
+        if not check_startup():
+            sys.exit(1)
+        return
+
+    from app.snapshot import export_snapshot, import_snapshot
+
+    with SessionLocal() as db:
+        if args.command == "export-snapshot":
+            stats = export_snapshot(db, args.path, pages=args.pages)
+            print(f"Exported snapshot: {stats}")
+        elif args.command == "import-snapshot":
+            try:
+                stats = import_snapshot(db, args.path)
+            except ValueError as e:
+                sys.exit(f"Import failed: {e}")
+            print(f"Imported snapshot: {stats}")
+
+
+if __name__ == "__main__":
+    main()
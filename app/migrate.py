@@ -0,0 +1,154 @@
+# Brings a database created before the page cache, search and unique part
+# number changes up to the current models. Every step checks the live schema
+# first, so running it again is a no-op.
+# Run: python -m app.manage migrate
+
+from collections import defaultdict
+
+from sqlalchemy import Connection, Engine, bindparam, inspect, select, text, update
+from sqlalchemy.schema import CreateIndex
+
+import app.models as models
+
+PAGE_DATA_COLUMNS = {
+    "content_hash": "VARCHAR(64) REFERENCES parts_souq_blobs (hash)",
+    "fetched_at": {
+        "postgresql": "TIMESTAMP WITH TIME ZONE",
+        "sqlite": "DATETIME",
+    },
+    "parsed_hash": "VARCHAR(64)",
+}
+
+
+class MigrationError(Exception):
+    pass
+
+
+def column_type(ddl: str | dict[str, str], dialect: str) -> str:
+    return ddl[dialect] if isinstance(ddl, dict) else ddl
+
+
+def index_names(conn: Connection, table: str) -> set[str]:
+    return {index["name"] for index in inspect(conn).get_indexes(table)}
+
+
+def migrate_page_data(conn: Connection):
+    dialect = conn.dialect.name
+    columns = {
+        column["name"]: column
+        for column in inspect(conn).get_columns(models.PartsSouqPageData.__tablename__)
+    }
+
+    for name, ddl in PAGE_DATA_COLUMNS.items():
+        if name not in columns:
+            conn.execute(
+                text(
+                    f"ALTER TABLE parts_souq_data ADD COLUMN {name} "
+                    f"{column_type(ddl, dialect)}"
+                )
+            )
+            print(f"Added parts_souq_data.{name}")
+
+    # Pages moved to parts_souq_blobs leave html_string empty
+    if not columns["html_string"]["nullable"]:
+        if dialect == "sqlite":
+            rebuild_sqlite_table(conn, models.PartsSouqPageData.__table__)
+        else:
+            conn.execute(
+                text(
+                    "ALTER TABLE parts_souq_data ALTER COLUMN html_string DROP NOT NULL"
+                )
+            )
+        print("Made parts_souq_data.html_string nullable")
+
+
+def rebuild_sqlite_table(conn: Connection, table):
+    # SQLite can't drop NOT NULL, copy into a table created from the model
+    old_name = f"{table.name}_old"
+    for name in index_names(conn, table.name):
+        conn.execute(text(f'DROP INDEX "{name}"'))
+    conn.execute(text(f'ALTER TABLE "{table.name}" RENAME TO "{old_name}"'))
+    table.create(conn)
+    old_columns = {column["name"] for column in inspect(conn).get_columns(old_name)}
+    columns = ", ".join(
+        f'"{column.name}"' for column in table.columns if column.name in old_columns
+    )
+    conn.execute(
+        text(
+            f'INSERT INTO "{table.name}" ({columns}) SELECT {columns} FROM "{old_name}"'
+        )
+    )
+    conn.execute(text(f'DROP TABLE "{old_name}"'))
+
+
+def part_number_changes(conn: Connection) -> list[dict] | None:
+    # The unique index needs every number normalised and distinct first
+    parts = models.Part.__table__
+    if "ix_parts_number" in index_names(conn, parts.name):
+        return None
+
+    rows = conn.execute(select(parts.c.id, parts.c.number)).all()
+    by_number: defaultdict[str, list[int]] = defaultdict(list)
+    for id, number in rows:
+        by_number[models.normalize_part_number(number)].append(id)
+
+    duplicates = {number: ids for number, ids in by_number.items() if len(ids) > 1}
+    if duplicates:
+        listed = "\n".join(
+            f"  {number}: part ids {ids}"
+            for number, ids in sorted(duplicates.items())[:20]
+        )
+        raise MigrationError(
+            f"{len(duplicates)} part numbers are duplicated once normalised, merge "
+            f"or delete them before parts.number can be made unique:\n{listed}"
+        )
+
+    return [
+        {"part_id": id, "normalized": models.normalize_part_number(number)}
+        for id, number in rows
+        if models.normalize_part_number(number) != number
+    ]
+
+
+def normalize_part_numbers(conn: Connection, changed: list[dict]):
+    parts = models.Part.__table__
+    conn.execute(
+        update(parts)
+        .where(parts.c.id == bindparam("part_id"))
+        .values(number=bindparam("normalized")),
+        changed,
+    )
+    print(f"Normalised {len(changed)} part numbers")
+
+
+def create_missing_indexes(conn: Connection):
+    dialect = conn.dialect
+    for table in models.Base.metadata.sorted_tables:
+        existing = index_names(conn, table.name)
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name in existing:
+                continue
+            # Postgres-only search indexes
+            ddl_if = index._ddl_if
+            if ddl_if is not None and ddl_if.dialect not in (None, dialect.name):
+                continue
+            conn.execute(CreateIndex(index))
+            print(f"Created index {index.name}")
+
+
+def migrate(engine: Engine):
+    with engine.begin() as conn:
+        existing = set(inspect(conn).get_table_names())
+        # Checked before any DDL, SQLite commits schema changes as it goes
+        number_changes = None
+        if models.Part.__tablename__ in existing:
+            number_changes = part_number_changes(conn)
+
+        # New tables, plus the pg_trgm extension on Postgres
+        models.Base.metadata.create_all(bind=conn)
+
+        if models.PartsSouqPageData.__tablename__ in existing:
+            migrate_page_data(conn)
+        if number_changes:
+            normalize_part_numbers(conn, number_changes)
+        create_missing_indexes(conn)
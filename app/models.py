@@ -1,9 +1,25 @@
 from __future__ import annotations
 
+import gzip
+import hashlib
 from typing import Annotated, List
 
 from pydantic import StringConstraints
-from sqlalchemy import Column, ForeignKey, Integer, String, Table
+from sqlalchemy import (
+    DDL,
+    JSON,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    Table,
+    event,
+    func,
+    literal,
+)
 from sqlalchemy.orm import Mapped, relationship
 
 from app.db import Base
@@ -96,7 +112,8 @@ class Part(Base):
     __tablename__ = "parts"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    number = Column(String, nullable=False)
+    # Stored normalised, see normalize_part_number
+    number = Column(String, nullable=False, unique=True, index=True)
     # amount = Column(String, nullable=True)
     note = Column(String, nullable=True)
     name = Column(String, nullable=False)
@@ -113,13 +130,98 @@ class Part(Base):
     )
 
 
+def part_search_document():
+    # Same expression in the index and in search queries so Postgres uses it,
+    # constants are inlined rather than bound for the same reason
+    parts = Part.__table__.c
+    return func.to_tsvector(
+        literal("simple", literal_execute=True),
+        parts.name
+        + literal(" ", literal_execute=True)
+        + func.coalesce(parts.note, literal("", literal_execute=True)),
+    )
+
+
+# Postgres only search indexes, SQLite searches parts in memory
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+Index(
+    "ix_parts_number_prefix",
+    Part.number,
+    postgresql_ops={"number": "varchar_pattern_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_parts_name_trgm",
+    Part.name,
+    postgresql_using="gin",
+    postgresql_ops={"name": "gin_trgm_ops"},
+).ddl_if(dialect="postgresql")
+Index(
+    "ix_parts_search_document", part_search_document(), postgresql_using="gin"
+).ddl_if(dialect="postgresql")
+
+
+def page_hash(html: str) -> str:
+    return hashlib.sha256(html.encode()).hexdigest()
+
+
+def compress_page(html: str) -> bytes:
+    return gzip.compress(html.encode(), mtime=0)
+
+
+def decompress_page(data: bytes) -> str:
+    return gzip.decompress(data).decode()
+
+
+# Gzipped page content, stored once per distinct content hash
+class PartsSouqPageBlob(Base):
+    __tablename__ = "parts_souq_blobs"
+
+    hash = Column(String(64), primary_key=True)
+    data = Column(LargeBinary, nullable=False)
+    # Uncompressed size in bytes
+    size = Column(Integer, nullable=False)
+
+
 # Cache html from urls, specifically group diagrams
 class PartsSouqPageData(Base):
     __tablename__ = "parts_souq_data"
 
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String, nullable=False)
-    html_string = Column(String, nullable=False)
+    content_hash = Column(
+        String(64), ForeignKey("parts_souq_blobs.hash"), nullable=True, index=True
+    )
+    # Uncompressed full pages cached before content_hash existed
+    html_string = Column(String, nullable=True)
+    # Last fetch, pages older than page_ttl_hours are re-scraped on refresh
+    fetched_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    # content_hash last parsed into diagrams and parts
+    parsed_hash = Column(String(64), nullable=True)
+
+    blob: Mapped["PartsSouqPageBlob"] = relationship("PartsSouqPageBlob")
+
+    @property
+    def html(self) -> str | None:
+        if self.blob is not None:
+            return decompress_page(self.blob.data)
+        return self.html_string
+
+
+# Last PartsSouq search results per part number, reloaded on startup
+class PartSearchResult(Base):
+    __tablename__ = "part_search_results"
+
+    number = Column(String, primary_key=True)
+    results = Column(JSON, nullable=False)
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
+def normalize_part_number(number: str) -> str:
+    return "".join(number.split()).upper()
 
 
 # TEST THIS
@@ -0,0 +1,181 @@
+from typing import Tuple
+
+from bs4 import BeautifulSoup, Tag
+
+from app.config import ParserBackend, settings
+from app.models import decompress_page
+from app.routers.utils import build_url
+from app.schemas import (
+    CreateDiagram,
+    CreateGroup,
+    CreatePart,
+    DiagramRow,
+    PartRow,
+)
+
+# Parsers are plain sync functions so they can run in the parse process pool,
+# keep arguments and return values picklable
+
+
+def make_soup(html: str, backend: ParserBackend | None = None) -> BeautifulSoup:
+    return BeautifulSoup(html, backend or settings.html_parser)
+
+
+def child_tags(tag: Tag) -> list[Tag]:
+    # Element children only, tree builders disagree on whitespace and <tbody>
+    return [child for child in tag.children if isinstance(child, Tag)]
+
+
+def extract_diagram_fragment(html: str, backend: ParserBackend | None = None) -> str:
+    # The diagram panels are all parse_group_rows needs from a group page
+    soup = make_soup(html, backend)
+    panels = soup.find_all("div", class_="panel panel-default")
+    return "".join(str(panel) for panel in panels)
+
+
+def parse_groups_html(
+    html: str, backend: ParserBackend | None = None
+) -> list[CreateGroup]:
+    soup = make_soup(html, backend)
+    groups_table = soup.find(
+        "table", class_="table-mage table table-bordered- table-stripped tree"
+    )
+    groups: list[CreateGroup] = []
+
+    # Direct rows only, html5lib wraps them in a <tbody>. First row is the header
+    body = groups_table.find("tbody", recursive=False) or groups_table
+    rows = body.find_all("tr", recursive=False)[1:]
+
+    for row in rows:
+        group_name = row.get_text().strip()
+        css_classes: list[str] = row.attrs["class"]
+
+        # Extract group number
+        id = next(
+            (
+                cls.split("-")[-1].strip()
+                for cls in css_classes
+                if "treegrid-" in cls and "treegrid-parent-" not in cls
+            ),
+            None,
+        )
+
+        # Determine if this is a root group
+        parent_id = next(
+            (
+                cls.split("-")[-1].strip()
+                for cls in css_classes
+                if "treegrid-parent-" in cls
+            ),
+            None,
+        )
+
+        # Extract link data if exists
+        link = row.find("a")
+        if link:
+            link = build_url(link["href"])
+
+        group = CreateGroup(
+            id=int(id),
+            name=group_name,
+            diagrams_url=link,
+            parent_group_id=parent_id,
+        )
+
+        groups.append(group)
+
+    return groups
+
+
+def parse_group_rows(
+    group_id: int, html: str | bytes, backend: ParserBackend | None = None
+) -> Tuple[list[DiagramRow], list[PartRow]]:
+    # Cached pages arrive compressed and are only inflated here
+    if isinstance(html, bytes):
+        html = decompress_page(html)
+    soup = make_soup(html, backend)
+
+    diagram_panels = soup.find_all("div", class_="panel panel-default")
+    diagrams: list[DiagramRow] = []
+    parts: list[PartRow] = []
+
+    for i, panel in enumerate(diagram_panels):
+        header, body = child_tags(panel)
+        diagram_title = header.find("h2").text.strip()
+
+        content_section = child_tags(body)[0]
+        parts_table, diagram_image = child_tags(content_section)
+
+        image_url = build_url(diagram_image.find("img")["src"])
+
+        diagram_id = int(f"{group_id}{i}")
+
+        # Parse parts, amount isn't stored yet
+        parts_rows = child_tags(parts_table.find("tbody") or parts_table)
+
+        for row in parts_rows:
+            number, name, part_code, note, amount, date_range = child_tags(row)
+            parts.append(
+                PartRow(
+                    number=number.text.strip(),
+                    note=note.text.strip(),
+                    name=name.text.strip(),
+                    date_range=date_range.text.strip(),
+                    parent_diagram_id=diagram_id,
+                )
+            )
+
+        diagrams.append(
+            DiagramRow(
+                id=diagram_id,
+                name=diagram_title,
+                img_url=image_url,
+                parent_group_id=group_id,
+            )
+        )
+
+    return diagrams, parts
+
+
+def parse_group_html(
+    group_id: int, html: str, backend: ParserBackend | None = None
+) -> Tuple[list[CreateDiagram], list[CreatePart]]:
+    diagram_rows, part_rows = parse_group_rows(group_id, html, backend)
+
+    diagrams = [CreateDiagram(**row._asdict()) for row in diagram_rows]
+    parts = [CreatePart(**row._asdict()) for row in part_rows]
+
+    return [diagrams, parts]
+
+
+def parse_search_html(html: str, backend: ParserBackend | None = None) -> list[dict]:
+    soup = make_soup(html, backend)
+    parts: list[dict] = []
+
+    search_rows = soup.find_all("div", class_="product-col list clearfix")
+
+    for search_row in search_rows:
+        [diagram, details, price_section] = child_tags(child_tags(search_row)[0])
+
+        img_url = build_url(diagram.find("img").get_attribute_list("src")[0])
+        name = details.find("h1").text.strip()
+        part_number = details.find("h2").text.split(":")[1].strip()
+        parts_avaliable = details.find("p", class_="mb-10px").text[-1].strip()
+        weight_kg = (
+            details.find("p", class_="hidden-xs mb-10px").text.split(":")[1].strip()
+        )
+
+        price = price_section.find("span", "price-new").text[:-1].strip()
+
+        parts.append(
+            {
+                "name": name,
+                "part_number": part_number,
+                "parts_avaliable": parts_avaliable,
+                "weight_kg": weight_kg,
+                "price_usd": price,
+                "img_url": img_url,
+            }
+        )
+
+    return parts
@@ -0,0 +1,159 @@
+import asyncio
+import heapq
+import re
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import islice
+from typing import Awaitable, Callable, Iterable, NamedTuple
+
+from starlette.concurrency import run_in_threadpool
+
+from app.catalog_cache import catalog_cache
+
+# How much a match in each field is worth, exact token matches count double
+NAME_WEIGHT = 3
+NUMBER_WEIGHT = 2
+NOTE_WEIGHT = 1
+NUMBER_EXACT_SCORE = 20
+NUMBER_PREFIX_SCORE = 10
+# Most index tokens a single query prefix expands to
+MAX_PREFIX_EXPANSION = 64
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class IndexedPart(NamedTuple):
+    id: int
+    number: str
+    note: str | None
+    name: str
+    date_range: str | None
+
+
+PartLoader = Callable[[], Awaitable[Iterable[IndexedPart]]]
+
+
+def tokenize(text: str | None) -> list[str]:
+    return TOKEN_RE.findall(text.lower()) if text else []
+
+
+def _prefix_range(keys: list[str], prefix: str) -> Iterable[str]:
+    i = bisect_left(keys, prefix)
+    while i < len(keys) and keys[i].startswith(prefix):
+        yield keys[i]
+        i += 1
+
+
+class PartIndex:
+    """In-memory inverted index over part names, numbers and notes.
+
+    Used for /parts/search where the database has no trigram/full text
+    support (SQLite). Rebuilt on the next search after a catalog write.
+    """
+
+    def __init__(self):
+        self.version: int | None = None
+        # Parts ordered by number, postings refer to them by position so
+        # ties rank by number with plain int comparisons
+        self.parts: list[IndexedPart] = []
+        self._postings: dict[str, dict[int, int]] = {}
+        self._tokens: list[str] = []
+        self._numbers: list[str] = []
+        self._lock = asyncio.Lock()
+
+    def build(self, parts: Iterable[IndexedPart]):
+        parts = sorted(parts, key=lambda part: part.number)
+        postings: dict[str, dict[int, int]] = defaultdict(dict)
+
+        for i, part in enumerate(parts):
+            for weight, text in (
+                (NOTE_WEIGHT, part.note),
+                (NUMBER_WEIGHT, part.number),
+                (NAME_WEIGHT, part.name),
+            ):
+                for token in tokenize(text):
+                    # Stored as an exact match score, prefix matches halve it
+                    postings[token][i] = max(postings[token].get(i, 0), weight * 2)
+
+        self.parts = parts
+        self._postings = dict(postings)
+        self._tokens = sorted(postings)
+        self._numbers = [part.number for part in parts]
+
+    async def ensure_current(self, load: PartLoader):
+        if self.version == catalog_cache.version:
+            return
+        async with self._lock:
+            version = catalog_cache.version
+            if self.version != version:
+                parts = await load()
+                await run_in_threadpool(self.build, parts)
+                self.version = version
+
+    def _match_token(self, token: str) -> dict[int, int]:
+        keys = list(islice(_prefix_range(self._tokens, token), MAX_PREFIX_EXPANSION))
+        if keys == [token]:
+            return self._postings[token]
+
+        scores: dict[int, int] = {}
+        for key in keys:
+            exact = key == token
+            for i, score in self._postings[key].items():
+                if not exact:
+                    score //= 2
+                if score > scores.get(i, 0):
+                    scores[i] = score
+        return scores
+
+    def search(self, query: str, limit: int) -> list[tuple[IndexedPart, int]]:
+        # Every word has to match somewhere, by prefix
+        matched: dict[int, int] = {}
+        tokens = tokenize(query)
+        if tokens:
+            matches = sorted((self._match_token(token) for token in tokens), key=len)
+            matched = matches[0]
+            for token_scores in matches[1:]:
+                matched = {
+                    i: score + token_scores[i]
+                    for i, score in matched.items()
+                    if i in token_scores
+                }
+
+        # Part numbers by prefix, they are stored normalised
+        number = "".join(query.split()).upper()
+        i = bisect_left(self._numbers, number)
+        if number and i < len(self._numbers) and self._numbers[i].startswith(number):
+            # Copy, matched may be a posting list
+            scores = dict(matched)
+            while i < len(self._numbers) and self._numbers[i].startswith(number):
+                exact = self._numbers[i] == number
+                scores[i] = scores.get(i, 0) + (
+                    NUMBER_EXACT_SCORE if exact else NUMBER_PREFIX_SCORE
+                )
+                i += 1
+            matched = scores
+
+        return [(self.parts[i], score) for i, score in _top(matched, limit)]
+
+
+def _top(scores: dict[int, int], limit: int) -> list[tuple[int, int]]:
+    # Highest scores first, then by number. Scores are small ints, so find
+    # the cut-off score and only sort what is above it.
+    if not scores:
+        return []
+    counts = Counter(scores.values())
+    threshold, kept = 0, 0
+    for score in sorted(counts, reverse=True):
+        threshold = score
+        kept += counts[score]
+        if kept >= limit:
+            break
+
+    above = sorted((-score, i) for i, score in scores.items() if score > threshold)
+    at = heapq.nsmallest(
+        limit - len(above), (i for i, score in scores.items() if score == threshold)
+    )
+    return [(i, -score) for score, i in above] + [(i, threshold) for i in at]
+
+
+part_index = PartIndex()
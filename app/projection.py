@@ -0,0 +1,92 @@
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only, raiseload, selectinload
+from sqlalchemy.orm.strategy_options import _AbstractLoad
+
+from app.config import settings
+
+
+@dataclass
+class Projection:
+    """Which columns and relationships of a model to load and return.
+
+    Built from `?fields=id,name,parts.number&expand=parts` style query
+    parameters. Only expanded relationships are loaded, each with one
+    selectinload, everything else raises instead of lazy loading.
+    """
+
+    model: type
+    fields: list[str]
+    expand: dict[str, "Projection"] = field(default_factory=dict)
+
+    def options(self) -> list[_AbstractLoad]:
+        options = [load_only(*(getattr(self.model, name) for name in self.fields))]
+        for name, child in self.expand.items():
+            options.append(
+                selectinload(getattr(self.model, name)).options(*child.options())
+            )
+        options.append(raiseload("*"))
+        return options
+
+    def dump(self, obj) -> dict[str, Any]:
+        data = {name: getattr(obj, name) for name in self.fields}
+        for name, child in self.expand.items():
+            data[name] = [child.dump(item) for item in getattr(obj, name)]
+        return data
+
+
+def _columns(model) -> list[str]:
+    return [column.key for column in inspect(model).column_attrs]
+
+
+def _relationships(model) -> dict[str, type]:
+    return {rel.key: rel.mapper.class_ for rel in inspect(model).relationships}
+
+
+def _split(value: str | None) -> list[str]:
+    return [item.strip() for item in (value or "").split(",") if item.strip()]
+
+
+def parse_projection(
+    model, fields: str | None = None, expand: str | None = None
+) -> Projection:
+    """Raises ValueError on unknown fields or relationships, or expansions
+    deeper than max_expand_depth."""
+
+    def build(model, path: tuple[str, ...]) -> Projection:
+        prefix = "".join(f"{name}." for name in path)
+        columns = _columns(model)
+        requested = [
+            name[len(prefix) :]
+            for name in _split(fields)
+            if name.startswith(prefix) and "." not in name[len(prefix) :]
+        ]
+        for name in requested:
+            if name not in columns:
+                raise ValueError(f"Unknown field {prefix}{name}")
+        # The primary key always comes back so clients can tell rows apart
+        selected = ["id"] + [name for name in requested if name != "id"]
+
+        relationships = _relationships(model)
+        projection = Projection(model, selected if requested else columns)
+        for name in _split(expand):
+            if not name.startswith(prefix) or "." in name[len(prefix) :]:
+                continue
+            name = name[len(prefix) :]
+            if name not in relationships:
+                raise ValueError(f"Unknown relationship {prefix}{name}")
+            if len(path) + 1 > settings.max_expand_depth:
+                raise ValueError(f"{prefix}{name} is nested too deep")
+            projection.expand[name] = build(relationships[name], (*path, name))
+        return projection
+
+    # Expanding "parts.diagrams" implies "parts"
+    paths = set()
+    for name in _split(expand):
+        parts = name.split(".")
+        paths.update(".".join(parts[: i + 1]) for i in range(len(parts)))
+    expand = ",".join(sorted(paths))
+
+    return build(model, ())
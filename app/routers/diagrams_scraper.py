@@ -0,0 +1,214 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import List
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import app.crud as crud
+import app.schemas as schemas
+from app.config import settings
+from app.crawler import CrawlStats, crawl_scheduler
+from app.db import get_db, get_read_db
+from app.executors import run_parse
+from app.parsers import extract_diagram_fragment, parse_group_rows
+from app.routers.souq_scraper_v2 import (
+    scrape_group_diagrams,
+    scrape_save_group_diagrams,
+)
+
+# Scraping side of /diagrams, only mounted when settings.enable_scrapers
+path_tag = "/diagrams"
+
+
+router = APIRouter(
+    prefix=path_tag,
+    tags=[path_tag],
+)
+
+
+@router.post("/scrape", response_model=List[schemas.CreateDiagram])
+async def scrape_all_diagrams(
+    db: Session = Depends(get_db), page_length: int = 435, token: int = 0
+):
+    groups = await run_in_threadpool(crud.get_diagram_groups, db)
+
+    # Detach from the session, commits expire ORM objects mid-crawl
+    valid_groups: list[schemas.GroupBase] = []
+    for group in groups:
+        if group.diagrams_url is not None:
+            valid_groups.append(schemas.GroupBase.model_validate(group))
+
+    results, stats = await crawl_scheduler.run(
+        valid_groups, scrape_group_diagrams, url=lambda group: group.diagrams_url
+    )
+    print(f"Scraped diagrams: {stats}")
+
+    diagrams: list[schemas.CreateDiagram] = []
+    parts: list[schemas.CreatePart] = []
+    for [new_diagrams, new_parts] in results:
+        diagrams.extend(new_diagrams)
+        parts.extend(new_parts)
+
+    stats = await run_in_threadpool(crud.post_bulk_diagrams, db, diagrams)
+    print(f"Wrote diagrams: {stats}")
+    stats = await run_in_threadpool(crud.post_bulk_parts, db, parts)
+    print(f"Wrote parts: {stats}")
+
+    return diagrams
+
+
+async def fetch_group_pages(db: Session, groups: list) -> dict:
+    # Detach from the session, commits expire ORM objects mid-crawl
+    valid_groups = [schemas.GroupBase.model_validate(group) for group in groups]
+
+    # Workers share the session, only one of them may use it at a time
+    db_lock = asyncio.Lock()
+
+    async def scrape_save(valid_group: schemas.GroupBase) -> bool:
+        [url, soup_str] = await scrape_save_group_diagrams(valid_group)
+        async with db_lock:
+            return await run_in_threadpool(
+                crud.post_html_url,
+                db,
+                schemas.CreatePartsSouqPageData(
+                    id=valid_group.id, url=url, html_string=soup_str
+                ),
+            )
+
+    changed, stats = await crawl_scheduler.run(
+        valid_groups, scrape_save, url=lambda group: group.diagrams_url
+    )
+    print(f"Scraped diagram urls: {stats}")
+
+    return {
+        "fetched": stats.pages,
+        "changed": sum(changed),
+        "unchanged": len(changed) - sum(changed),
+        "errors": stats.errors,
+    }
+
+
+# Cache pages of groups that don't have one yet
+@router.post("/scrape/url", response_model=List[schemas.PartsSouqPageData])
+async def scrape_all_diagram_urls(db: Session = Depends(get_db)):
+    groups = await run_in_threadpool(crud.get_stale_groups, db)
+    await fetch_group_pages(db, groups)
+
+    return []
+
+
+# Re-fetch pages older than page_ttl_hours, only changed pages are re-parsed
+@router.post("/refresh")
+async def refresh_diagrams(db: Session = Depends(get_db)) -> dict:
+    start = time.perf_counter()
+    max_age = timedelta(hours=settings.page_ttl_hours)
+    groups = await run_in_threadpool(crud.get_stale_groups, db, max_age)
+
+    report = {"stale": len(groups)}
+    report.update(await fetch_group_pages(db, groups))
+    diagrams, stats = await reparse_group_pages(db, changed_only=True)
+    report["parsed"] = stats.pages
+    report["parse_errors"] = stats.errors
+    report["diagrams"] = len(diagrams)
+    report["wall_time"] = round(time.perf_counter() - start, 2)
+    print(f"Refreshed diagrams: {report}")
+
+    return report
+
+
+@router.get("/cache")
+def get_page_cache_stats(db: Session = Depends(get_read_db)) -> dict:
+    return crud.get_page_cache_stats(db)
+
+
+# Move pages cached as full uncompressed html into compressed fragments
+@router.post("/cache/compact")
+async def compact_page_cache(db: Session = Depends(get_db)) -> dict:
+    batch_size = settings.parse_workers * 8
+    while True:
+        pages = await run_in_threadpool(crud.get_legacy_pages, db, batch_size)
+        if len(pages) == 0:
+            break
+
+        fragments = await asyncio.gather(
+            *(run_parse(extract_diagram_fragment, html) for _, _, html in pages)
+        )
+        for (id, url, _), fragment in zip(pages, fragments):
+            await run_in_threadpool(
+                crud.post_html_url,
+                db,
+                schemas.CreatePartsSouqPageData(id=id, url=url, html_string=fragment),
+            )
+
+    pruned = await run_in_threadpool(crud.prune_page_blobs, db)
+    print(f"Pruned {pruned} unused page blobs")
+
+    return await run_in_threadpool(crud.get_page_cache_stats, db)
+
+
+async def reparse_group_pages(
+    db: Session, changed_only: bool = False
+) -> tuple[list[schemas.DiagramRow], CrawlStats]:
+    diagrams: list[schemas.DiagramRow] = []
+    stats = CrawlStats()
+    start = time.perf_counter()
+
+    async def parse_pages(pages: list[tuple[int, str]]):
+        return await asyncio.gather(
+            *(run_parse(parse_group_rows, group_id, html) for group_id, html in pages),
+            return_exceptions=True,
+        )
+
+    async def write_rows(pages: list[tuple[int, str]], results: list):
+        diagram_rows: list[schemas.DiagramRow] = []
+        part_rows: list[schemas.PartRow] = []
+        parsed_ids: list[int] = []
+        for (group_id, _), result in zip(pages, results):
+            if isinstance(result, Exception):
+                stats.errors += 1
+                print(f"Error parsing group {group_id}: {str(result)}")
+                continue
+            stats.pages += 1
+            parsed_ids.append(group_id)
+            diagram_rows.extend(result[0])
+            part_rows.extend(result[1])
+
+        await run_in_threadpool(crud.post_bulk_diagram_rows, db, diagram_rows)
+        await run_in_threadpool(crud.post_bulk_part_rows, db, part_rows)
+        await run_in_threadpool(crud.mark_pages_parsed, db, parsed_ids)
+        diagrams.extend(diagram_rows)
+
+    # Parse the next batch of cached pages in the process pool while the
+    # previous batch is written
+    batch_size = settings.parse_workers * 8
+    pending = None
+    after_id = None
+    while True:
+        pages = await run_in_threadpool(
+            crud.get_group_pages, db, batch_size, after_id, changed_only
+        )
+        parsing = asyncio.ensure_future(parse_pages(pages))
+        if pending is not None:
+            await write_rows(*pending)
+        pending = (pages, await parsing)
+
+        if len(pages) < batch_size:
+            break
+        after_id = pages[-1][0]
+
+    await write_rows(*pending)
+
+    stats.wall_time = time.perf_counter() - start
+    return diagrams, stats
+
+
+# ensure each group has a diagram
+@router.post("/clean", response_model=List[schemas.CreateDiagram])
+async def clean_all_diagrams(db: Session = Depends(get_db)):
+    diagrams, stats = await reparse_group_pages(db)
+    print(f"Re-parsed diagrams: {stats}, {len(diagrams)} diagrams")
+
+    return [diagram._asdict() for diagram in diagrams]
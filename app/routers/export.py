@@ -0,0 +1,73 @@
+import json
+import zlib
+from enum import Enum
+
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+
+import app.crud as crud
+import app.models as models
+from app.config import settings
+from app.db import AsyncReadSessionLocal
+
+path_tag = "/export"
+
+
+router = APIRouter(
+    prefix=path_tag,
+    tags=[path_tag],
+)
+
+
+class ExportTable(str, Enum):
+    groups = "groups"
+    diagrams = "diagrams"
+    parts = "parts"
+    group_groups = "group_groups"
+    group_diagrams = "group_diagrams"
+    diagram_parts = "diagram_parts"
+
+
+EXPORT_TABLES = {
+    ExportTable.groups: models.Group.__table__,
+    ExportTable.diagrams: models.Diagram.__table__,
+    ExportTable.parts: models.Part.__table__,
+    ExportTable.group_groups: models.group_group_association_table,
+    ExportTable.group_diagrams: models.group_diagram_association_table,
+    ExportTable.diagram_parts: models.diagram_part_association_table,
+}
+
+
+# One NDJSON line per row, streamed from a server-side cursor
+@router.get("/{table}")
+async def export_table(table: ExportTable, gzip: bool = False) -> StreamingResponse:
+    async def stream():
+        # The request's session is closed before the body streams, use our own
+        async with AsyncReadSessionLocal() as db:
+            async for rows in crud.stream_table_rows(
+                db, EXPORT_TABLES[table], settings.export_chunk_size
+            ):
+                yield "".join(
+                    json.dumps(row, separators=(",", ":")) + "\n" for row in rows
+                ).encode()
+
+    async def compress(chunks):
+        compressor = zlib.compressobj(wbits=31)
+        async for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.flush()
+
+    filename = f"{table.value}.ndjson"
+    if gzip:
+        return StreamingResponse(
+            compress(stream()),
+            media_type="application/gzip",
+            headers={"Content-Disposition": f'attachment; filename="{filename}.gz"'},
+        )
+    return StreamingResponse(
+        stream(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -1,12 +1,14 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 import app.crud as crud
 import app.schemas as schemas
-from app.db import get_db
-from app.routers.souq_scraper_v2 import scrape_groups
+from app.catalog_cache import catalog_cache
+from app.config import settings
+from app.db import get_async_db, get_async_read_db, get_db
 
 path_tag = "/groups"
 
@@ -17,32 +19,39 @@ router = APIRouter(
 )
 
 
+# The catalog cache reads the primary, a lagging replica would get cached
 @router.get("/", response_model=List[schemas.PartialGroup])
-async def get_nested_groups(db: Session = Depends(get_db)):
-    groups = crud.get_groups_nested(db)
+async def get_nested_groups(db: AsyncSession = Depends(get_async_db)):
+    catalog = await catalog_cache.get(lambda: crud.get_catalog_async(db))
 
-    return groups
+    return Response(catalog.tree_json, media_type="application/json")
 
 
-@router.get("/{id}", response_model=schemas.DiagramGroup)
-async def get_group(id: int, db: Session = Depends(get_db)):
-    group: schemas.DiagramGroup = crud.get_group(db, id)
-
-    if group is None:
-        raise HTTPException(status_code=404, detail="Group not found")
+@router.get("/flat", response_model=schemas.Page[schemas.GroupBase])
+async def get_flat_groups(
+    db: AsyncSession = Depends(get_async_read_db),
+    page_length: int = Query(10, ge=1, le=settings.max_page_length),
+    cursor: str | None = None,
+):
+    try:
+        groups, next_cursor = await crud.get_groups_flat_async(db, page_length, cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-    return group
+    return {"items": groups, "next_cursor": next_cursor}
 
 
-@router.post("/scrape", response_model=List[schemas.CreateGroup])
-async def scrape_all_groups(db: Session = Depends(get_db)):
-    groups = await scrape_groups()
+@router.get("/{id}", response_model=schemas.DiagramGroup)
+async def get_group(id: int, db: AsyncSession = Depends(get_async_db)):
+    catalog = await catalog_cache.get(lambda: crud.get_catalog_async(db))
+    group_json = catalog.get_group_json(id)
 
-    crud.post_bulk_groups(db, groups)
+    if group_json is None:
+        raise HTTPException(status_code=404, detail="Group not found")
 
-    return groups
+    return Response(group_json, media_type="application/json")
 
 
 @router.delete("/wipe", response_model=List[schemas.Group])
-async def delete_all_groups(db: Session = Depends(get_db)):
+def delete_all_groups(db: Session = Depends(get_db)):
     crud.wipe_groups(db)
@@ -0,0 +1,29 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+import app.crud as crud
+import app.schemas as schemas
+from app.db import get_db
+from app.routers.souq_scraper_v2 import scrape_groups
+
+# Scraping side of /groups, only mounted when settings.enable_scrapers
+path_tag = "/groups"
+
+
+router = APIRouter(
+    prefix=path_tag,
+    tags=[path_tag],
+)
+
+
+@router.post("/scrape", response_model=List[schemas.CreateGroup])
+async def scrape_all_groups(db: Session = Depends(get_db)):
+    groups = await scrape_groups()
+
+    stats = await run_in_threadpool(crud.post_bulk_groups, db, groups)
+    print(f"Wrote groups: {stats}")
+
+    return groups
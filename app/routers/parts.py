@@ -1,11 +1,16 @@
-from typing import List
+from typing import Any
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 import app.crud as crud
+import app.models as models
 import app.schemas as schemas
-from app.db import get_db
+from app.autocomplete import part_autocomplete
+from app.config import settings
+from app.db import async_read_engine, get_async_db, get_async_read_db
+from app.part_index import part_index
+from app.projection import parse_projection
 
 path_tag = "/parts"
 
@@ -16,10 +21,69 @@ router = APIRouter(
 )
 
 
-@router.get("/", response_model=List[schemas.Part])
+@router.get("/", response_model=schemas.Page[dict[str, Any]])
 async def get_all_parts(
-    db: Session = Depends(get_db), page_length: int = 10, token: int = 0
+    db: AsyncSession = Depends(get_async_read_db),
+    page_length: int = Query(10, ge=1, le=settings.max_page_length),
+    cursor: str | None = None,
+    fields: str | None = None,
+    expand: str | None = "diagrams",
 ):
-    parts = crud.get_parts(db, page_length, token)
+    try:
+        projection = parse_projection(models.Part, fields, expand)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    return parts
+    try:
+        parts, next_cursor = await crud.get_parts_async(
+            db, page_length, cursor, projection
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return {
+        "items": [projection.dump(part) for part in parts],
+        "next_cursor": next_cursor,
+    }
+
+
+def use_database_search() -> bool:
+    if settings.part_search_backend == "auto":
+        return async_read_engine.dialect.name == "postgresql"
+    return settings.part_search_backend == "database"
+
+
+# Database search reads the replica. The in-memory index is built from the
+# primary, a lagging replica would get cached as the current version
+@router.get("/search", response_model=list[schemas.PartMatch])
+async def search_parts(
+    db: AsyncSession = Depends(get_async_read_db),
+    primary: AsyncSession = Depends(get_async_db),
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=settings.max_page_length),
+):
+    if use_database_search():
+        rows = await crud.search_parts_async(db, q, limit)
+        return [row._asdict() for row in rows]
+
+    await part_index.ensure_current(lambda: crud.get_indexed_parts_async(primary))
+    return [
+        {**part._asdict(), "score": score}
+        for part, score in part_index.search(q, limit)
+    ]
+
+
+@router.get("/autocomplete", response_model=schemas.PartCompletions)
+async def autocomplete_parts(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(10, ge=1, le=settings.max_page_length),
+):
+    return {
+        "numbers": part_autocomplete.complete_number(q, limit),
+        "names": part_autocomplete.complete_name(q, limit),
+    }
+
+
+@router.get("/autocomplete/stats")
+def get_autocomplete_stats() -> dict:
+    return part_autocomplete.stats()
@@ -3,8 +3,10 @@ from urllib.parse import parse_qs, urlsplit
 
 from bs4 import BeautifulSoup
 from fastapi import APIRouter
-from seleniumbase import Driver
 
+from app.executors import run_parse
+from app.fetcher import page_fetcher
+from app.parsers import parse_search_html
 from app.routers.utils import (
     SouqPartCategoryNames,
     SouqToolsUrlPath,
@@ -92,10 +94,79 @@ async def get_groups() -> dict[str, list[SouqGroup]]:
     }
 
     url = build_url(SouqToolsUrlPath.groups, group_query)
-    driver = Driver(uc=True, headless=False)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
+    page_source = await page_fetcher.fetch(url)
 
-    soup = BeautifulSoup(driver.page_source, "html5lib")
+    return await run_parse(parse_groups_html, page_source)
+
+
+@router.post("/group/diagrams")
+async def get_group_diagrams(souq_group: SouqGroup) -> list[SouqGroupDiagram]:
+    souq_group = SouqGroup(**souq_group)
+
+    query: SouqQuery = {
+        "c": souq_group.car,
+        "ssd": souq_group.ssd,
+        "gid": souq_group.souq_gid,
+        "vid": 0,
+        "q": "",
+    }
+    url = build_url(SouqToolsUrlPath.group_diagram, query=query)
+    page_source = await page_fetcher.fetch(url)
+
+    return await run_parse(parse_group_diagrams_html, souq_group, page_source)
+
+
+@router.get("/category-diagram")
+async def get_category_diagrams(
+    part_category: SouqPartCategoryNames,
+) -> list[SouqCategoryDiagram]:
+    query: SouqQuery = {
+        "ssd": get_category_ssd(part_category.value).value,
+        "cname": part_category.value,
+        "cid": get_category_id(part_category).value,
+        "c": "TOYOTA00",
+        "vid": "0",
+        "q": "",
+    }
+
+    url = build_url(SouqToolsUrlPath.categories, query)
+    page_source = await page_fetcher.fetch(url)
+
+    return await run_parse(parse_category_diagrams_html, page_source)
+
+
+# Returns parts for a standard diagram
+@router.post("/catalog-diagram/parts")
+async def get_catalog_diagram_parts(
+    souq_diagram: SouqCategoryDiagram,
+) -> list[SouqCategoryPart]:
+    query: SouqQuery = {
+        "c": souq_diagram.car,
+        "ssd": souq_diagram.ssd,
+        "uid": souq_diagram.souq_uid,
+        "cid": souq_diagram.cid,
+    }
+    url = build_url(SouqToolsUrlPath.diagram, query=query)
+    page_source = await page_fetcher.fetch(url)
+
+    return await run_parse(parse_catalog_diagram_parts_html, souq_diagram, page_source)
+
+
+@router.post("/parts/{part_number}")
+async def get_part_search_list(
+    part_number: str,
+) -> list[SouqSearchPart]:
+    query: SouqQuery = {
+        "q": part_number,
+    }
+    url = build_url(SouqToolsUrlPath.search, query=query)
+    page_source = await page_fetcher.fetch(url)
+
+    return await run_parse(parse_search_html, page_source)
+
+
+def parse_groups_html(page_source: str) -> dict[str, list[SouqGroup]]:
+    soup = BeautifulSoup(page_source, "html5lib")
     groups_table = soup.find(
         "table", class_="table-mage table table-bordered- table-stripped tree"
     )
@@ -155,26 +226,13 @@ async def get_groups() -> dict[str, list[SouqGroup]]:
             grouped_data[parent] = []
         grouped_data[parent].append(group)
 
-    driver.quit()
     return grouped_data
 
 
-@router.post("/group/diagrams")
-async def get_group_diagrams(souq_group: SouqGroup) -> list[SouqGroupDiagram]:
-    souq_group = SouqGroup(**souq_group)
-
-    query: SouqQuery = {
-        "c": souq_group.car,
-        "ssd": souq_group.ssd,
-        "gid": souq_group.souq_gid,
-        "vid": 0,
-        "q": "",
-    }
-    url = build_url(SouqToolsUrlPath.group_diagram, query=query)
-    driver = Driver(uc=True, headless=False)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
+def parse_group_diagrams_html(
+    souq_group: SouqGroup, page_source: str
+) -> list[SouqGroupDiagram]:
+    soup = BeautifulSoup(page_source, "html5lib")
     diagram_panels = soup.find_all("div", class_="panel panel-default")
     diagrams: list[SouqGroupDiagram] = []
 
@@ -217,28 +275,11 @@ async def get_group_diagrams(souq_group: SouqGroup) -> list[SouqGroupDiagram]:
             }
         )
 
-    driver.quit()
     return diagrams
 
 
-@router.get("/category-diagram")
-async def get_category_diagrams(
-    part_category: SouqPartCategoryNames,
-) -> list[SouqCategoryDiagram]:
-    query: SouqQuery = {
-        "ssd": get_category_ssd(part_category.value).value,
-        "cname": part_category.value,
-        "cid": get_category_id(part_category).value,
-        "c": "TOYOTA00",
-        "vid": "0",
-        "q": "",
-    }
-
-    url = build_url(SouqToolsUrlPath.categories, query)
-    driver = Driver(uc=True, headless=False)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
+def parse_category_diagrams_html(page_source: str) -> list[SouqCategoryDiagram]:
+    soup = BeautifulSoup(page_source, "html5lib")
     diagrams_data: list[SouqCategoryDiagram] = []
 
     diagrams = soup.find_all("div", "thumbnail thumb-boss")
@@ -271,26 +312,13 @@ async def get_category_diagrams(
             }
         )
 
-    driver.quit()
     return diagrams_data
 
 
-# Returns parts for a standard diagram
-@router.post("/catalog-diagram/parts")
-async def get_catalog_diagram_parts(
-    souq_diagram: SouqCategoryDiagram,
+def parse_catalog_diagram_parts_html(
+    souq_diagram: SouqCategoryDiagram, page_source: str
 ) -> list[SouqCategoryPart]:
-    query: SouqQuery = {
-        "c": souq_diagram.car,
-        "ssd": souq_diagram.ssd,
-        "uid": souq_diagram.souq_uid,
-        "cid": souq_diagram.cid,
-    }
-    url = build_url(SouqToolsUrlPath.diagram, query=query)
-    driver = Driver(uc=True, headless=False)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
+    soup = BeautifulSoup(page_source, "html5lib")
     parts: list[SouqCategoryPart] = []
 
     part_rows = soup.find_all("tr", class_="part-search-tr")
@@ -311,51 +339,6 @@ async def get_catalog_diagram_parts(
             }
         )
 
-    driver.quit()
-    return parts
-
-
-@router.post("/parts/{part_number}")
-async def get_part_search_list(
-    part_number: str,
-) -> list[SouqSearchPart]:
-    query: SouqQuery = {
-        "q": part_number,
-    }
-    url = build_url(SouqToolsUrlPath.search, query=query)
-    driver = Driver(uc=True, headless=False)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
-    parts: list[SouqSearchPart] = []
-
-    search_rows = soup.find_all("div", class_="product-col list clearfix")
-
-    for search_row in search_rows:
-        [diagram, details, price_section] = search_row.contents[0].contents
-
-        img_url = build_url(diagram.find("img").get_attribute_list("src")[0])
-        name = details.find("h1").text.strip()
-        part_number = details.find("h2").text.split(":")[1].strip()
-        parts_avaliable = details.find("p", class_="mb-10px").text[-1].strip()
-        weight_kg = (
-            details.find("p", class_="hidden-xs mb-10px").text.split(":")[1].strip()
-        )
-
-        price = price_section.find("span", "price-new").text[:-1].strip()
-
-        parts.append(
-            {
-                "name": name,
-                "part_number": part_number,
-                "parts_avaliable": parts_avaliable,
-                "weight_kg": weight_kg,
-                "price_usd": price,
-                "img_url": img_url,
-            }
-        )
-
-    driver.quit()
     return parts
 
 
@@ -1,11 +1,23 @@
 import asyncio
-from typing import Tuple
+from contextlib import nullcontext
+from typing import Any, Callable, Tuple, TypeVar
 from urllib.parse import parse_qs, urlsplit
 
 from bs4 import BeautifulSoup
-from fastapi import APIRouter
-from seleniumbase import Driver
-
+from fastapi import APIRouter, Body
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+
+from app.config import settings
+from app.executors import run_parse
+from app.fetcher import page_fetcher
+from app.models import normalize_part_number
+from app.parsers import (
+    extract_diagram_fragment,
+    parse_group_html,
+    parse_groups_html,
+    parse_search_html,
+)
 from app.routers.utils import (
     SouqToolsUrlPath,
     build_url,
@@ -13,12 +25,18 @@ from app.routers.utils import (
 from app.schemas import (
     CreateDiagram,
     CreateGroup,
-    CreatePart,
     Group,
     Part,
     PartDetailed,
     SouqQuery,
 )
+from app.search_cache import search_cache
+from app.singleflight import scrape_flight
+
+R = TypeVar("R")
+
+part_detailed_adapter = TypeAdapter(list[PartDetailed])
+part_search_line_adapter = TypeAdapter(dict[str, Any])
 
 path_tag = "/souq/v2"
 
@@ -29,6 +47,15 @@ router = APIRouter(
 )
 
 
+async def fetch_and_parse(url: str, parse: Callable[..., R], *args) -> R:
+    # Concurrent calls for the same page share one fetch and parse
+    async def fetch_parse() -> R:
+        page_source = await page_fetcher.fetch(url)
+        return await run_parse(parse, *args, page_source)
+
+    return await scrape_flight.do((url, parse.__name__, *args), fetch_parse)
+
+
 @router.get("/group")
 async def scrape_groups() -> list[CreateGroup]:
     group_query: SouqQuery = {
@@ -40,57 +67,7 @@ async def scrape_groups() -> list[CreateGroup]:
     }
 
     url = build_url(SouqToolsUrlPath.groups, group_query)
-    driver = Driver(uc=True, headless=True)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
-    groups_table = soup.find(
-        "table", class_="table-mage table table-bordered- table-stripped tree"
-    )
-    groups: list[CreateGroup] = []
-
-    rows = groups_table.contents[0].contents[1:]
-
-    for row in rows:
-        group_name = row.get_text().strip()
-        css_classes: list[str] = row.attrs["class"]
-
-        # Extract group number
-        id = next(
-            (
-                cls.split("-")[-1].strip()
-                for cls in css_classes
-                if "treegrid-" in cls and "treegrid-parent-" not in cls
-            ),
-            None,
-        )
-
-        # Determine if this is a root group
-        parent_id = next(
-            (
-                cls.split("-")[-1].strip()
-                for cls in css_classes
-                if "treegrid-parent-" in cls
-            ),
-            None,
-        )
-
-        # Extract link data if exists
-        link = row.find("a")
-        if link:
-            link = build_url(link["href"])
-
-        group = CreateGroup(
-            id=int(id),
-            name=group_name,
-            diagrams_url=link,
-            parent_group_id=parent_id,
-        )
-
-        groups.append(group)
-
-    driver.quit()
-    return groups
+    return await fetch_and_parse(url, parse_groups_html)
 
 
 # pagination is for the valid groups, not diagrams
@@ -140,13 +117,7 @@ async def scrape_save_group_diagrams(
         "q": "",
     }
     url = build_url(SouqToolsUrlPath.group_diagram, query=query)
-    driver = Driver(uc=True, headless=True)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
-
-    driver.quit()
-    return [url, str(soup)]
+    return [url, await fetch_and_parse(url, extract_diagram_fragment)]
 
 
 @router.post("/group/diagrams")
@@ -165,113 +136,67 @@ async def scrape_group_diagrams(
         "q": "",
     }
     url = build_url(SouqToolsUrlPath.group_diagram, query=query)
-    driver = Driver(uc=True, headless=True)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
+    return await fetch_and_parse(url, parse_group_html, souq_group.id)
 
-    soup = BeautifulSoup(driver.page_source, "html5lib")
 
-    diagram_panels = soup.find_all("div", class_="panel panel-default")
-    diagrams: list[CreateDiagram] = []
-    parts: list[CreatePart] = []
-
-    for i, panel in enumerate(diagram_panels):
-        header, body = panel.contents
-        diagram_title = header.find("h2").text.strip()
-
-        content_section = body.contents[0]
-        parts_table, diagram_image = content_section.contents
-
-        image_url = build_url(diagram_image.find("img")["src"])
-
-        diagram_id = int(f"{souq_group.id}{i}")
-
-        # Parse parts
-        parts_rows = parts_table.find("tbody").contents
-
-        for j, row in enumerate(parts_rows):
-            number, name, part_code, note, amount, date_range = row.contents
-            amount = amount.text.strip()
-            while amount is not None and len(amount) > 1 and amount[0] == "0":
-                amount = amount[1:]
-            if amount == "" or amount == "X" or amount == "x":
-                amount = None
-            else:
-                amount = int(amount)
-            part = {
-                "name": str(name.text.strip()),
-                "parent_diagram_id": diagram_id,
-                "number": str(number.text.strip()),
-                "note": note.text.strip(),
-                "amount": amount,
-                "date_range": date_range.text.strip(),
-            }
+async def search_part(
+    number: str, limit: asyncio.Semaphore | None = None
+) -> list[dict]:
+    # limit only wraps the scrape, cache hits never wait on it
+    async def search() -> list[dict]:
+        query: SouqQuery = {
+            "q": number,
+        }
+        url = build_url(SouqToolsUrlPath.search, query=query)
+        async with limit or nullcontext():
+            return await fetch_and_parse(url, parse_search_html)
 
-            parts.append(
-                CreatePart(
-                    name=part["name"],
-                    parent_diagram_id=part["parent_diagram_id"],
-                    number=part["number"],
-                    note=part["note"],
-                    amount=part["amount"],
-                    date_range=part["date_range"],
-                )
-            )
-
-        diagrams.append(
-            CreateDiagram(
-                id=diagram_id,
-                name=diagram_title,
-                img_url=image_url,
-                parent_group_id=souq_group.id,
-            )
-        )
-
-    driver.quit()
-    return [diagrams, parts]
+    return await search_cache.get(number, search)
 
 
 @router.post("/parts/{part_number}")
 async def get_part_search_list(
     part_number: str,
 ) -> list[PartDetailed]:
-    query: SouqQuery = {
-        "q": part_number,
-    }
-    url = build_url(SouqToolsUrlPath.search, query=query)
-    driver = Driver(uc=True, headless=True)
-    driver.uc_open_with_reconnect(url, reconnect_time=4)
-
-    soup = BeautifulSoup(driver.page_source, "html5lib")
-    parts: list[PartDetailed] = []
-
-    search_rows = soup.find_all("div", class_="product-col list clearfix")
-
-    for search_row in search_rows:
-        [diagram, details, price_section] = search_row.contents[0].contents
-
-        img_url = build_url(diagram.find("img").get_attribute_list("src")[0])
-        name = details.find("h1").text.strip()
-        part_number = details.find("h2").text.split(":")[1].strip()
-        parts_avaliable = details.find("p", class_="mb-10px").text[-1].strip()
-        weight_kg = (
-            details.find("p", class_="hidden-xs mb-10px").text.split(":")[1].strip()
-        )
-
-        price = price_section.find("span", "price-new").text[:-1].strip()
-
-        parts.append(
-            {
-                "name": name,
-                "part_number": part_number,
-                "parts_avaliable": parts_avaliable,
-                "weight_kg": weight_kg,
-                "price_usd": price,
-                "img_url": img_url,
+    return await search_part(normalize_part_number(part_number))
+
+
+# Price a list of part numbers, one NDJSON line per number as it resolves
+@router.post("/parts")
+async def get_part_search_batch(
+    part_numbers: list[str] = Body(..., max_length=settings.search_batch_max),
+) -> StreamingResponse:
+    numbers = list(dict.fromkeys(normalize_part_number(n) for n in part_numbers))
+    # Cache hits come back straight away, only scrapes queue on the limit
+    limit = asyncio.Semaphore(settings.search_batch_workers)
+
+    async def resolve(number: str) -> bytes:
+        try:
+            results = await search_part(number, limit)
+            line = {
+                "part_number": number,
+                "results": part_detailed_adapter.validate_python(results),
             }
-        )
+        except Exception as e:
+            line = {"part_number": number, "error": str(e)}
+        return part_search_line_adapter.dump_json(line) + b"\n"
+
+    async def stream():
+        tasks = [asyncio.create_task(resolve(number)) for number in numbers]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # Client went away, stop scraping for it
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
 
-    driver.quit()
-    return parts
+@router.get("/parts/cache")
+async def get_part_search_cache_stats() -> dict:
+    return search_cache.stats()
 
 
 def parse_table_row(row: BeautifulSoup) -> dict:
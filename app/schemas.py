@@ -1,7 +1,14 @@
-from typing import List, Optional
+from typing import Generic, List, NamedTuple, Optional, TypeVar
 
 from pydantic import BaseModel
 
+T = TypeVar("T")
+
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None
+
 
 class SouqQuery(BaseModel):
     c: str
@@ -37,6 +44,16 @@ class Part(PartBase):
         orm_mode = True
 
 
+class PartMatch(PartBase):
+    id: int
+    score: float
+
+
+class PartCompletions(BaseModel):
+    numbers: list[str]
+    names: list[str]
+
+
 class CreatePart(PartBase):
     parent_diagram_id: int
 
@@ -68,6 +85,9 @@ class GroupBase(BaseModel):
     name: str
     diagrams_url: Optional[str] = None
 
+    class Config:
+        from_attributes = True
+
 
 class CreateGroup(GroupBase):
     parent_group_id: Optional[int] = None
@@ -90,6 +110,22 @@ class Group(GroupBase):
         orm_mode = True
 
 
+# Compact rows for bulk parsing and writing, cheap to pickle between processes
+class DiagramRow(NamedTuple):
+    id: int
+    name: str
+    img_url: Optional[str]
+    parent_group_id: int
+
+
+class PartRow(NamedTuple):
+    number: str
+    note: Optional[str]
+    name: str
+    date_range: Optional[str]
+    parent_diagram_id: int
+
+
 class PartsSouqPageDataBase(BaseModel):
     id: int
     url: str
@@ -0,0 +1,159 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+from sqlalchemy import inspect
+from starlette.concurrency import run_in_threadpool
+
+import app.crud as crud
+import app.models as models
+from app.config import settings
+from app.db import SessionLocal
+
+SearchLoader = Callable[[], Awaitable[list[dict]]]
+
+
+@dataclass
+class SearchEntry:
+    results: list[dict]
+    # Wall clock so persisted entries keep their age across restarts
+    fetched_at: float
+
+
+def utc_timestamp(value: datetime) -> float:
+    # Postgres returns timestamptz in the session zone, SQLite hands back
+    # naive datetimes that were stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).timestamp()
+
+
+class SearchCache:
+    """Bounded LRU + TTL cache for PartsSouq search results.
+
+    Entries past `ttl` are still served, up to `stale_ttl`, while a single
+    background task refreshes them.
+    """
+
+    def __init__(
+        self, max_entries: int, ttl: float, stale_ttl: float, persist: bool = False
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.persist = persist
+
+        self._entries: OrderedDict[str, SearchEntry] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._saving: set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_errors = 0
+        self.save_errors = 0
+
+    async def get(self, key: str, load: SearchLoader) -> list[dict]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            age = time.time() - entry.fetched_at
+            if age < self.ttl:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return entry.results
+            if age < self.stale_ttl:
+                self.stale_hits += 1
+                self._entries.move_to_end(key)
+                if key not in self._refreshing:
+                    task = asyncio.create_task(self._refresh(key, load))
+                    self._refreshing[key] = task
+                return entry.results
+
+        self.misses += 1
+        results = await load()
+        await self._store(key, results)
+        return results
+
+    async def _refresh(self, key: str, load: SearchLoader):
+        try:
+            await self._store(key, await load())
+            self.refreshes += 1
+        except Exception as e:
+            self.refresh_errors += 1
+            print(f"Error refreshing search {key}: {str(e)}")
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def _store(self, key: str, results: list[dict]):
+        entry = SearchEntry(results=results, fetched_at=time.time())
+        self._put(key, entry)
+        if self.persist:
+            # Written in the background, callers already have their results
+            task = asyncio.create_task(run_in_threadpool(self._save, key, entry))
+            self._saving.add(task)
+            task.add_done_callback(self._saving.discard)
+
+    def _put(self, key: str, entry: SearchEntry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self, key: str, entry: SearchEntry):
+        fetched_at = datetime.fromtimestamp(entry.fetched_at, timezone.utc)
+        try:
+            with SessionLocal() as db:
+                crud.post_search_result(db, key, entry.results, fetched_at)
+        except Exception as e:
+            # The entry is still served from memory, only the restart copy is lost
+            self.save_errors += 1
+            print(f"Error saving search {key}: {str(e)}")
+
+    def load(self):
+        # Warm from the DB, most recent first so the LRU order survives
+        if not self.persist:
+            return
+        with SessionLocal() as db:
+            if not inspect(db.get_bind()).has_table(
+                models.PartSearchResult.__tablename__
+            ):
+                print(
+                    "Search cache not persisted, part_search_results is missing. "
+                    "Run python -m app.manage create-schema"
+                )
+                self.persist = False
+                return
+            rows = crud.get_search_results(db, self.max_entries)
+        for row in reversed(rows):
+            self._put(
+                row.number, SearchEntry(row.results, utc_timestamp(row.fetched_at))
+            )
+
+    async def shutdown(self):
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        self._refreshing.clear()
+        # Let pending writes land before the engines are disposed
+        await asyncio.gather(*self._saving)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refresh_errors": self.refresh_errors,
+            "save_errors": self.save_errors,
+        }
+
+
+search_cache = SearchCache(
+    max_entries=settings.search_cache_size,
+    ttl=settings.search_cache_ttl,
+    stale_ttl=settings.search_cache_stale_ttl,
+    persist=settings.search_cache_persist,
+)
@@ -0,0 +1,40 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+R = TypeVar("R")
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one.
+
+    The first caller runs `fn`, everyone arriving while it is in flight
+    awaits the same result (or exception).
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[R]]) -> R:
+        self.calls += 1
+        future = self._inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            # One waiter being cancelled mustn't cancel the shared call
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(fn())
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "inflight": len(self._inflight),
+        }
+
+
+scrape_flight = SingleFlight()
@@ -0,0 +1,174 @@
+import gzip
+import io
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import IO, Iterator
+
+import msgpack
+from sqlalchemy import Table, select, text
+from sqlalchemy.orm import Session
+
+import app.models as models
+from app.config import settings
+
+FORMAT = "car-parts-snapshot"
+VERSION = 1
+
+# Restore order, parents before the tables pointing at them
+CATALOG_TABLES: list[Table] = [
+    models.Group.__table__,
+    models.Diagram.__table__,
+    models.Part.__table__,
+    models.group_group_association_table,
+    models.group_diagram_association_table,
+    models.diagram_part_association_table,
+]
+PAGE_TABLES: list[Table] = [
+    models.PartsSouqPageBlob.__table__,
+    models.PartsSouqPageData.__table__,
+]
+TABLES = {table.name: table for table in CATALOG_TABLES + PAGE_TABLES}
+
+
+@dataclass
+class SnapshotStats:
+    rows: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+    def __str__(self) -> str:
+        tables = ", ".join(f"{name} {rows}" for name, rows in self.rows.items())
+        return f"{tables} in {self.seconds:.2f}s"
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        # SQLite hands back naive datetimes, they are stored as UTC
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return msgpack.Timestamp.from_datetime(value)
+    raise TypeError(f"Can't snapshot {type(value).__name__}")
+
+
+def _open(path: str, mode: str) -> IO[bytes]:
+    return gzip.open(path, mode) if path.endswith(".gz") else open(path, mode)
+
+
+def export_snapshot(db: Session, path: str, pages: bool = False) -> SnapshotStats:
+    """Write the catalog (and optionally the page cache) as msgpack.
+
+    A header map is followed by one map per block of rows, each holding a
+    table's columns as parallel arrays.
+    """
+    start = time.perf_counter()
+    stats = SnapshotStats()
+    tables = CATALOG_TABLES + (PAGE_TABLES if pages else [])
+    packer = msgpack.Packer(default=_encode)
+
+    with _open(path, "wb") as file:
+        file.write(
+            packer.pack(
+                {
+                    "format": FORMAT,
+                    "version": VERSION,
+                    "created_at": datetime.now(timezone.utc),
+                    "tables": [table.name for table in tables],
+                }
+            )
+        )
+        for table in tables:
+            columns = [column.name for column in table.columns]
+            stats.rows[table.name] = 0
+            query = (
+                select(table)
+                .order_by(*table.primary_key.columns)
+                .execution_options(yield_per=settings.bulk_chunk_size)
+            )
+            for rows in db.execute(query).partitions():
+                block = {"table": table.name, "columns": dict(zip(columns, zip(*rows)))}
+                file.write(packer.pack(block))
+                stats.rows[table.name] += len(rows)
+
+    stats.seconds = time.perf_counter() - start
+    return stats
+
+
+def _read_blocks(file: IO[bytes]) -> Iterator[dict]:
+    unpacker = msgpack.Unpacker(file, timestamp=3, raw=False, max_buffer_size=0)
+    header = next(unpacker, None)
+    if not isinstance(header, dict) or header.get("format") != FORMAT:
+        raise ValueError("Not a catalog snapshot")
+    if header.get("version") != VERSION:
+        raise ValueError(f"Unsupported snapshot version {header.get('version')}")
+    yield header
+    yield from unpacker
+
+
+def _copy_value(value) -> str:
+    # COPY text format
+    if value is None:
+        return "\\N"
+    if isinstance(value, bytes):
+        return "\\\\x" + value.hex()
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+def _copy_rows(db: Session, table: Table, columns: dict[str, list]):
+    buffer = io.StringIO()
+    for row in zip(*columns.values()):
+        buffer.write("\t".join(_copy_value(value) for value in row) + "\n")
+    buffer.seek(0)
+
+    cursor = db.connection().connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def _insert_rows(db: Session, table: Table, columns: dict[str, list]):
+    rows = [dict(zip(columns, row)) for row in zip(*columns.values())]
+    db.execute(table.insert(), rows)
+
+
+def import_snapshot(db: Session, path: str) -> SnapshotStats:
+    """Replace the tables in the snapshot with its rows, in one transaction."""
+    start = time.perf_counter()
+    stats = SnapshotStats()
+    postgres = db.get_bind().dialect.name == "postgresql"
+    load = _copy_rows if postgres else _insert_rows
+
+    with _open(path, "rb") as file:
+        blocks = _read_blocks(file)
+        header = next(blocks)
+        tables = [TABLES[name] for name in header["tables"]]
+
+        for table in reversed(tables):
+            db.execute(table.delete())
+        for block in blocks:
+            table = TABLES[block["table"]]
+            columns = block["columns"]
+            load(db, table, columns)
+            stats.rows[table.name] = stats.rows.get(table.name, 0) + len(
+                next(iter(columns.values()), [])
+            )
+
+    if postgres and models.Part.__table__ in tables:
+        # Explicit ids were copied in, move the serial past them
+        db.execute(
+            text(
+                "SELECT setval(pg_get_serial_sequence('parts', 'id'), "
+                "COALESCE(MAX(id), 1)) FROM parts"
+            )
+        )
+    db.commit()
+
+    stats.seconds = time.perf_counter() - start
+    return stats
@@ -0,0 +1,68 @@
+# Synthetic catalogs for the bulk write and endpoint benchmarks
+
+import app.crud as crud
+import app.models as models
+from app.autocomplete import part_autocomplete
+from app.catalog_cache import catalog_cache
+from app.db import SessionLocal, engine
+from app.schemas import CreateGroup, DiagramRow, PartRow
+
+# Parts per catalog, groups and diagrams scale with it
+CATALOG_SIZES = [1_000, 10_000, 50_000]
+PARTS_PER_DIAGRAM = 40
+DIAGRAMS_PER_GROUP = 5
+
+
+def reset_schema():
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    catalog_cache.invalidate()
+    part_autocomplete.clear()
+
+
+def make_catalog(
+    parts: int,
+) -> tuple[list[CreateGroup], list[DiagramRow], list[PartRow]]:
+    diagram_count = max(1, parts // PARTS_PER_DIAGRAM)
+    group_count = max(1, diagram_count // DIAGRAMS_PER_GROUP)
+
+    # Five children per group, like the treegrid on the groups page
+    groups = [
+        CreateGroup(
+            id=i,
+            name=f"Group {i}",
+            diagrams_url=f"https://partsouq.com/en/catalog/genuine/parts?gid={i}",
+            parent_group_id=i // 5 if i >= 5 else None,
+        )
+        for i in range(1, group_count + 1)
+    ]
+    diagrams = [
+        DiagramRow(
+            id=i,
+            name=f"Diagram {i}",
+            img_url=f"https://partsouq.com/img/{i}.png",
+            parent_group_id=i % group_count + 1,
+        )
+        for i in range(1, diagram_count + 1)
+    ]
+    # One in ten rows reuses an earlier number, parts shared across diagrams
+    part_rows = [
+        PartRow(
+            number=f"{90000 + (i // 10 if i % 10 == 0 else i):06d}-{i % 97:05d}",
+            note="FOR LHD" if i % 3 == 0 else "",
+            name=f"BOLT, FLANGE {i % 500}",
+            date_range="199801-200708",
+            parent_diagram_id=i % diagram_count + 1,
+        )
+        for i in range(parts)
+    ]
+    return groups, diagrams, part_rows
+
+
+def load_catalog(parts: int):
+    groups, diagrams, part_rows = make_catalog(parts)
+    reset_schema()
+    with SessionLocal() as db:
+        crud.post_bulk_groups(db, groups)
+        crud.post_bulk_diagram_rows(db, diagrams)
+        crud.post_bulk_part_rows(db, part_rows)
@@ -0,0 +1,65 @@
+# BENCHMARKS
+# Run: pytest benchmarks
+# Save a baseline: pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-save=baseline
+# Compare to it: pytest benchmarks --benchmark-storage=benchmarks/results --benchmark-compare=0001 --benchmark-compare-fail=mean:20%
+# Local Postgres: BENCH_SQLALCHEMY_STRING=postgresql://... pytest benchmarks
+#
+# Results are per machine (benchmarks/results/<platform>/NNNN_name.json) and
+# not committed. Save a baseline on the machine you compare on, before the
+# change being measured.
+#
+# Tables are dropped and recreated, so the database is a scratch one given by
+# BENCH_SQLALCHEMY_STRING and never SQLALCHEMY_STRING
+
+import os
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(tempfile.mkdtemp(prefix="car-parts-bench-"))
+os.environ["SQLALCHEMY_STRING"] = os.environ.get(
+    "BENCH_SQLALCHEMY_STRING", f"sqlite:///{BENCH_DIR / 'bench.db'}"
+)
+for name in (
+    "ASYNC_SQLALCHEMY_STRING",
+    "READ_REPLICA_STRING",
+    "ASYNC_READ_REPLICA_STRING",
+):
+    os.environ.pop(name, None)
+# API only, the scraper stack isn't measured here
+os.environ["ENABLE_SCRAPERS"] = "false"
+
+from app.db import SessionLocal  # noqa: E402
+
+FIXTURES = Path(__file__).parent / "fixtures"
+
+
+def read_fixture(name: str) -> str:
+    return (FIXTURES / name).read_text()
+
+
+@pytest.fixture(scope="session")
+def group_html() -> str:
+    return read_fixture("group.html")
+
+
+@pytest.fixture(scope="session")
+def group_large_html() -> str:
+    return read_fixture("group_large.html")
+
+
+@pytest.fixture(scope="session")
+def groups_html() -> str:
+    return read_fixture("groups.html")
+
+
+@pytest.fixture(scope="session")
+def search_html() -> str:
+    return read_fixture("search.html")
+
+
+@pytest.fixture
+def db():
+    with SessionLocal() as db:
+        yield db
@@ -0,0 +1,82 @@
+# Regenerate the HTML fixtures: python benchmarks/fixtures/make_fixtures.py
+# Markup follows the PartsSouq pages the parsers read, values are synthetic
+
+import random
+from pathlib import Path
+
+FIXTURES = Path(__file__).parent
+
+
+def group_page(panels: int = 4, rows: int = 12, ws: str = "") -> str:
+    random.seed(1)
+    diagram_panels = []
+    for p in range(panels):
+        part_rows = "".join(
+            f'<tr class="part-search-tr">{ws}'
+            f"<td>{random.randint(10000, 99999)}-"
+            f"{random.choice(['60060', '0K010', '35030A'])}</td>{ws}"
+            f"<td>BOLT &amp; NUT {r}</td>{ws}"
+            f"<td>{r}</td>{ws}"
+            f"<td>{'' if r % 3 else 'FOR LHD'}</td>{ws}"
+            f"<td>{random.choice(['01', '02', 'X', ''])}</td>{ws}"
+            f"<td>199801-200708</td>{ws}</tr>{ws}"
+            for r in range(rows)
+        )
+        diagram_panels.append(
+            f'<div class="panel panel-default">{ws}'
+            f'<div class="panel-heading"><h2> Diagram {p} </h2></div>{ws}'
+            f'<div class="panel-body">{ws}<div class="row">{ws}'
+            f'<table class="table"><thead><tr><th>No</th></tr></thead>'
+            f"<tbody>{ws}{part_rows}</tbody></table>{ws}"
+            f'<div class="img"><img src="/img/{p}.png"></div>{ws}'
+            f"</div>{ws}</div>{ws}</div>"
+        )
+    return (
+        "<!DOCTYPE html><html><head><title>Group</title></head><body>"
+        f'<div class="container">{ws.join(diagram_panels)}</div></body></html>'
+    )
+
+
+def groups_page(groups: int = 450, ws: str = "") -> str:
+    rows = [f"<tr><th>Name</th></tr>{ws}"]
+    for i in range(1, groups):
+        parent = f" treegrid-parent-{i // 5}" if i >= 5 else ""
+        name = f"Group {i}"
+        if i % 2:
+            name = (
+                '<a href="/en/catalog/genuine/parts?c=TOYOTA00&amp;ssd=abc'
+                f'&amp;gid={i}">{name}</a>'
+            )
+        rows.append(
+            f'<tr class="treegrid-{i}{parent}">{ws}<td>{name}</td>{ws}</tr>{ws}'
+        )
+    return (
+        '<html><body><table class="table-mage table table-bordered- '
+        f'table-stripped tree">{"".join(rows)}</table></body></html>'
+    )
+
+
+def search_page(results: int = 10) -> str:
+    rows = "".join(
+        '<div class="product-col list clearfix"><div class="row">'
+        f'<div class="img"><img src="/p/{i}.jpg"></div>'
+        f'<div class="details"><h1> PART {i} </h1><h2>Number: 68810-6006{i}</h2>'
+        f'<p class="mb-10px">Available: {i % 10}</p>'
+        f'<p class="hidden-xs mb-10px">Weight: 0.{i}</p></div>'
+        f'<div class="price"><span class="price-new">{i}.50$</span></div>'
+        "</div></div>"
+        for i in range(results)
+    )
+    return f"<html><body>{rows}</body></html>"
+
+
+if __name__ == "__main__":
+    pages = {
+        "group.html": group_page(),
+        "group_large.html": group_page(panels=12, rows=40, ws="\n  "),
+        "groups.html": groups_page(),
+        "search.html": search_page(),
+    }
+    for name, html in pages.items():
+        (FIXTURES / name).write_text(html)
+        print(f"Wrote {name}: {len(html)} bytes")
@@ -0,0 +1,61 @@
+import pytest
+
+import app.crud as crud
+from benchmarks.catalog import make_catalog, reset_schema
+
+BULK_SIZES = [1_000, 10_000]
+
+
+@pytest.mark.benchmark(group="bulk groups")
+def test_post_bulk_groups(benchmark, db):
+    groups, _, _ = make_catalog(50_000)
+
+    def setup():
+        reset_schema()
+        return (db, groups), {}
+
+    stats = benchmark.pedantic(crud.post_bulk_groups, setup=setup, rounds=5)
+    assert stats.rows == len(groups)
+
+
+@pytest.mark.benchmark(group="bulk diagrams")
+@pytest.mark.parametrize("parts", BULK_SIZES)
+def test_post_bulk_diagram_rows(benchmark, db, parts):
+    groups, diagrams, _ = make_catalog(parts * 10)
+
+    def setup():
+        reset_schema()
+        crud.post_bulk_groups(db, groups)
+        return (db, diagrams), {}
+
+    stats = benchmark.pedantic(crud.post_bulk_diagram_rows, setup=setup, rounds=5)
+    assert stats.rows == len(diagrams)
+
+
+@pytest.mark.benchmark(group="bulk parts insert")
+@pytest.mark.parametrize("parts", BULK_SIZES)
+def test_post_bulk_part_rows_insert(benchmark, db, parts):
+    groups, diagrams, part_rows = make_catalog(parts)
+
+    def setup():
+        reset_schema()
+        crud.post_bulk_groups(db, groups)
+        crud.post_bulk_diagram_rows(db, diagrams)
+        return (db, part_rows), {}
+
+    stats = benchmark.pedantic(crud.post_bulk_part_rows, setup=setup, rounds=5)
+    assert stats.rows == parts
+
+
+@pytest.mark.benchmark(group="bulk parts upsert")
+@pytest.mark.parametrize("parts", BULK_SIZES)
+def test_post_bulk_part_rows_existing(benchmark, db, parts):
+    # Re-scraping an unchanged catalog, every row is already there
+    groups, diagrams, part_rows = make_catalog(parts)
+    reset_schema()
+    crud.post_bulk_groups(db, groups)
+    crud.post_bulk_diagram_rows(db, diagrams)
+    crud.post_bulk_part_rows(db, part_rows)
+
+    stats = benchmark.pedantic(crud.post_bulk_part_rows, args=(db, part_rows), rounds=5)
+    assert stats.rows == parts
@@ -0,0 +1,50 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from benchmarks.catalog import CATALOG_SIZES, load_catalog
+
+
+@pytest.fixture(scope="module", params=CATALOG_SIZES, ids=lambda n: f"{n}_parts")
+def client(request):
+    load_catalog(request.param)
+    with TestClient(app) as client:
+        yield client
+
+
+def get(client: TestClient, url: str) -> dict | list:
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.benchmark(group="GET /groups/")
+def test_get_group_tree(benchmark, client):
+    assert benchmark(get, client, "/groups/")
+
+
+@pytest.mark.benchmark(group="GET /groups/{id}")
+def test_get_group(benchmark, client):
+    assert benchmark(get, client, "/groups/1")["id"] == 1
+
+
+@pytest.mark.benchmark(group="GET /diagrams/")
+def test_get_diagrams(benchmark, client):
+    page = benchmark(get, client, "/diagrams/?page_length=100")
+    assert page["items"]
+
+
+@pytest.mark.benchmark(group="GET /parts/")
+def test_get_parts(benchmark, client):
+    page = benchmark(get, client, "/parts/?page_length=100")
+    assert len(page["items"]) == 100
+
+
+@pytest.mark.benchmark(group="GET /parts/search")
+def test_search_parts(benchmark, client):
+    assert benchmark(get, client, "/parts/search?q=flange%2012")
+
+
+@pytest.mark.benchmark(group="GET /parts/autocomplete")
+def test_autocomplete_parts(benchmark, client):
+    assert benchmark(get, client, "/parts/autocomplete?q=0900")["numbers"]
@@ -0,0 +1,38 @@
+import pytest
+
+from app.parsers import (
+    parse_group_html,
+    parse_group_rows,
+    parse_groups_html,
+    parse_search_html,
+)
+
+BACKENDS = ["lxml", "html.parser", "html5lib"]
+
+
+@pytest.mark.benchmark(group="parse group page")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_group_html(benchmark, group_html, backend):
+    diagrams, parts = benchmark(parse_group_html, 1, group_html, backend)
+    assert len(diagrams) == 4 and len(parts) == 48
+
+
+@pytest.mark.benchmark(group="parse group page")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_group_rows_large(benchmark, group_large_html, backend):
+    diagrams, parts = benchmark(parse_group_rows, 1, group_large_html, backend)
+    assert len(diagrams) == 12 and len(parts) == 480
+
+
+@pytest.mark.benchmark(group="parse groups page")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_groups_html(benchmark, groups_html, backend):
+    groups = benchmark(parse_groups_html, groups_html, backend)
+    assert len(groups) == 449
+
+
+@pytest.mark.benchmark(group="parse search page")
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_parse_search_html(benchmark, search_html, backend):
+    results = benchmark(parse_search_html, search_html, backend)
+    assert len(results) == 10
@@ -0,0 +1,32 @@
+# TESTS
+# Run: pytest tests
+#
+# Tests use a throwaway SQLite database and never SQLALCHEMY_STRING
+
+import os
+import tempfile
+from pathlib import Path
+
+TEST_DIR = Path(tempfile.mkdtemp(prefix="car-parts-test-"))
+os.environ["SQLALCHEMY_STRING"] = f"sqlite:///{TEST_DIR / 'test.db'}"
+for name in (
+    "ASYNC_SQLALCHEMY_STRING",
+    "READ_REPLICA_STRING",
+    "ASYNC_READ_REPLICA_STRING",
+):
+    os.environ.pop(name, None)
+
+import pytest  # noqa: E402
+
+import app.models as models  # noqa: E402
+from app.db import SessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture
+def db():
+    # Start empty, the benchmarks share the engine when run in one session
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        yield db
+    models.Base.metadata.drop_all(bind=engine)
@@ -0,0 +1,24 @@
+import asyncio
+
+from app.catalog_cache import CatalogCache
+
+
+def test_concurrent_reads_share_one_rebuild():
+    cache = CatalogCache()
+    loads = 0
+
+    async def load():
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.05)
+        return [], {}
+
+    async def run():
+        snapshots = await asyncio.gather(*(cache.get(load) for _ in range(20)))
+        assert len({id(snapshot) for snapshot in snapshots}) == 1
+
+        cache.invalidate()
+        await asyncio.gather(*(cache.get(load) for _ in range(20)))
+
+    asyncio.run(run())
+    assert loads == 2
@@ -0,0 +1,179 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import select
+
+import app.crud as crud
+import app.models as models
+import app.schemas as schemas
+from app.config import settings
+from app.parsers import extract_diagram_fragment
+
+GROUP_HTML = (
+    Path(__file__).parent.parent / "benchmarks" / "fixtures" / "group.html"
+).read_text()
+
+
+def add_group(db, id: int):
+    db.add(
+        models.Group(
+            id=id,
+            name=f"Group {id}",
+            diagrams_url=f"https://partsouq.com/en/catalog/genuine/parts?gid={id}",
+        )
+    )
+    db.commit()
+
+
+def fetch_page(db, id: int, html: str):
+    crud.post_html_url(
+        db,
+        schemas.CreatePartsSouqPageData(
+            id=id, url=f"https://partsouq.com/g/{id}", html_string=html
+        ),
+    )
+
+
+def add_legacy_page(db, id: int, html: str):
+    # Cached before content_hash existed
+    db.add(
+        models.PartsSouqPageData(
+            id=id, url=f"https://partsouq.com/g/{id}", html_string=html
+        )
+    )
+    db.commit()
+
+
+def changed_ids(db) -> list[int]:
+    pages = crud.get_group_pages(db, page_length=100, changed_only=True)
+    return [id for id, _ in pages]
+
+
+def test_parsed_pages_are_not_reparsed(db):
+    add_group(db, 1)
+    add_group(db, 2)
+    fetch_page(db, 1, "<html>one</html>")
+    add_legacy_page(db, 2, "<html>two</html>")
+    assert changed_ids(db) == [1, 2]
+
+    crud.mark_pages_parsed(db, [1, 2])
+    assert changed_ids(db) == []
+
+    fetch_page(db, 1, "<html>one, updated</html>")
+    assert changed_ids(db) == [1]
+
+
+def test_compacted_legacy_page_stays_parsed(db):
+    add_group(db, 2)
+    add_legacy_page(db, 2, GROUP_HTML)
+    crud.mark_pages_parsed(db, [2])
+
+    # Compaction and re-scrapes store the diagram fragment, not the full page
+    fetch_page(db, 2, extract_diagram_fragment(GROUP_HTML))
+    assert changed_ids(db) == []
+
+    fetch_page(db, 2, extract_diagram_fragment(GROUP_HTML.replace("BOLT", "NUT")))
+    assert changed_ids(db) == [2]
+
+
+def add_diagrams(db, *ids: int):
+    add_group(db, 1)
+    crud.post_bulk_diagram_rows(
+        db,
+        [
+            schemas.DiagramRow(
+                id=id, name=f"Diagram {id}", img_url=None, parent_group_id=1
+            )
+            for id in ids
+        ],
+    )
+
+
+def part_row(number: str, diagram_id: int, name: str = "BOLT") -> schemas.PartRow:
+    return schemas.PartRow(
+        number=number,
+        note=None,
+        name=name,
+        date_range=None,
+        parent_diagram_id=diagram_id,
+    )
+
+
+def part_diagrams(db) -> dict[str, set[int]]:
+    links = db.execute(
+        select(models.Part.number, models.diagram_part_association_table.c.diagram_id)
+        .select_from(models.Part)
+        .join(models.diagram_part_association_table)
+    ).all()
+    diagrams: dict[str, set[int]] = {}
+    for number, diagram_id in links:
+        diagrams.setdefault(number, set()).add(diagram_id)
+    return diagrams
+
+
+def test_bulk_parts_collapse_number_variants(db):
+    add_diagrams(db, 10)
+    crud.post_bulk_part_rows(
+        db,
+        [
+            part_row("90105-0k010", 10),
+            part_row(" 90105-0K010", 10),
+            part_row("90105 -0K010", 10),
+        ],
+    )
+    numbers = db.scalars(select(models.Part.number)).all()
+    assert numbers == ["90105-0K010"]
+    assert part_diagrams(db) == {"90105-0K010": {10}}
+
+
+def test_bulk_parts_link_every_diagram(db):
+    add_diagrams(db, 10, 11, 12)
+    crud.post_bulk_part_rows(
+        db,
+        [
+            part_row("90105-0K010", 10),
+            part_row("90105-0K010", 11),
+            part_row("90105-0k010", 12),
+            part_row("90080-36057", 11),
+        ],
+    )
+    assert part_diagrams(db) == {
+        "90105-0K010": {10, 11, 12},
+        "90080-36057": {11},
+    }
+
+
+def test_bulk_parts_reingest_is_idempotent(db):
+    add_diagrams(db, 10, 11)
+    rows = [part_row("90105-0K010", 10), part_row("90080-36057", 11)]
+    crud.post_bulk_part_rows(db, rows)
+    ids = dict(db.execute(select(models.Part.number, models.Part.id)).all())
+
+    crud.post_bulk_part_rows(db, [*rows, part_row("90105-0K010", 10, name="NEW")])
+    assert dict(db.execute(select(models.Part.number, models.Part.id)).all()) == ids
+    links = db.execute(select(models.diagram_part_association_table)).all()
+    assert len(links) == 2
+    # First write wins, re-ingest doesn't rename
+    assert (
+        db.scalar(select(models.Part.name).where(models.Part.number == "90105-0K010"))
+        == "BOLT"
+    )
+
+
+def test_bulk_parts_resolve_ids_across_chunks(db, monkeypatch):
+    monkeypatch.setattr(settings, "bulk_chunk_size", 3)
+    add_diagrams(db, 10, 11)
+    # The same number in the first and last chunk, and new ones in between
+    rows = [part_row(f"90000-{i:05d}", 10) for i in range(7)]
+    rows.append(part_row("90000-00000", 11))
+    crud.post_bulk_part_rows(db, rows)
+
+    diagrams = part_diagrams(db)
+    assert len(diagrams) == 7
+    assert diagrams["90000-00000"] == {10, 11}
+    assert all(diagrams[f"90000-{i:05d}"] == {10} for i in range(1, 7))
+
+
+def test_blank_search_matches_nothing():
+    # Returns before querying, like the in-memory index
+    assert asyncio.run(crud.search_parts_async(None, "  \t ", 10)) == []
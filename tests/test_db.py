@@ -0,0 +1,40 @@
+import pytest
+from sqlalchemy import create_engine, exc
+
+from app.db import PoolMetrics, engine_options
+
+
+def make_engine(tmp_path, name: str, **options):
+    engine_kwargs = engine_options(f"sqlite:///{tmp_path / 'pool.db'}", name)
+    engine_kwargs.update(options)
+    return create_engine(f"sqlite:///{tmp_path / 'pool.db'}", **engine_kwargs)
+
+
+def metrics(engine) -> PoolMetrics:
+    return engine.pool.metrics
+
+
+def test_exhausted_pool_counts_as_timeout(tmp_path):
+    engine = make_engine(
+        tmp_path, "test_timeout", pool_size=1, max_overflow=0, pool_timeout=0.05
+    )
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    stats = metrics(engine).stats()
+    assert stats["timeouts"] == 1
+    assert stats["checkouts"] == 2
+    engine.dispose()
+
+
+def test_connect_error_is_not_a_timeout(tmp_path):
+    def refuse():
+        raise ConnectionRefusedError("database is down")
+
+    engine = make_engine(tmp_path, "test_connect_error", creator=refuse)
+    with pytest.raises(ConnectionRefusedError):
+        engine.connect()
+    stats = metrics(engine).stats()
+    assert stats["timeouts"] == 0
+    assert stats["checkouts"] == 0
+    engine.dispose()
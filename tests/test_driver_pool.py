@@ -0,0 +1,138 @@
+import threading
+import time
+
+import pytest
+
+from app.driver_pool import DriverPool
+
+
+class FakeDriver:
+    def __init__(self):
+        self.broken = False
+        self.quit_called = False
+        self.page_source = "<html></html>"
+
+    @property
+    def current_url(self) -> str:
+        if self.broken:
+            raise RuntimeError("session deleted")
+        return "about:blank"
+
+    def uc_open_with_reconnect(self, url: str, reconnect_time: int):
+        pass
+
+    def uc_open(self, url: str):
+        pass
+
+    def quit(self):
+        self.quit_called = True
+
+
+class FakeDriverFactory:
+    def __init__(self):
+        self.drivers: list[FakeDriver] = []
+
+    def __call__(self) -> FakeDriver:
+        driver = FakeDriver()
+        self.drivers.append(driver)
+        return driver
+
+
+@pytest.fixture
+def factory() -> FakeDriverFactory:
+    return FakeDriverFactory()
+
+
+def make_pool(factory: FakeDriverFactory, size: int = 3, max_pages: int = 50):
+    pool = DriverPool(size=size, max_pages=max_pages, driver_factory=factory)
+    pool.start()
+    return pool
+
+
+def test_concurrent_leases_stay_within_size(factory):
+    pool = make_pool(factory, size=3)
+    lock = threading.Lock()
+    leased = 0
+    most_leased = 0
+
+    def borrow():
+        nonlocal leased, most_leased
+        for _ in range(5):
+            with pool.lease() as pooled:
+                with lock:
+                    leased += 1
+                    most_leased = max(most_leased, leased)
+                pooled.get_page_source("https://partsouq.com/")
+                time.sleep(0.002)
+                with lock:
+                    leased -= 1
+
+    threads = [threading.Thread(target=borrow) for _ in range(12)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    pool.shutdown()
+
+    assert most_leased == 3
+    # Idle drivers are reused rather than created per lease
+    assert len(factory.drivers) <= 3
+    assert all(driver.quit_called for driver in factory.drivers)
+
+
+def test_broken_driver_is_replaced(factory):
+    pool = make_pool(factory, size=1)
+    with pool.lease() as pooled:
+        first = pooled.driver
+    first.broken = True
+
+    with pool.lease() as pooled:
+        assert pooled.driver is not first
+    assert first.quit_called
+    assert len(factory.drivers) == 2
+
+
+def test_driver_failing_mid_lease_is_not_reused(factory):
+    pool = make_pool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        with pool.lease() as pooled:
+            first = pooled.driver
+            raise RuntimeError("page load failed")
+
+    with pool.lease() as pooled:
+        assert pooled.driver is not first
+    assert first.quit_called
+
+
+def test_driver_recycled_after_max_pages(factory):
+    pool = make_pool(factory, size=1, max_pages=2)
+    for _ in range(4):
+        pool.fetch("https://partsouq.com/")
+    assert len(factory.drivers) == 2
+    assert factory.drivers[0].quit_called
+
+
+def test_waiter_does_not_start_a_driver_after_shutdown(factory):
+    pool = make_pool(factory, size=1)
+    errors: list[Exception] = []
+
+    def wait_for_slot():
+        try:
+            with pool.lease():
+                pass
+        except RuntimeError as e:
+            errors.append(e)
+
+    with pool.lease():
+        waiter = threading.Thread(target=wait_for_slot)
+        waiter.start()
+        time.sleep(0.05)
+        pool.shutdown()
+    waiter.join(timeout=1)
+
+    assert len(errors) == 1
+    assert len(factory.drivers) == 1
+    # The slot went back, a restarted pool can still lease
+    pool.start()
+    with pool.lease():
+        pass
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import httpx
+import pytest
+
+from app.executors import executors
+from app.fetcher import PageFetcher, is_challenge
+
+GOOD_PAGE = (
+    "<html><head><title>Parts</title>"
+    '<script src="/cdn-cgi/challenge-platform/scripts/jsd/main.js"></script>'
+    "</head><body>catalog</body></html>"
+)
+CHALLENGE_PAGE = (
+    "<html><head><title>Just a moment...</title></head>"
+    "<body><script>window._cf_chl_opt={cvId: '3'};</script></body></html>"
+)
+
+
+class FakePool:
+    # Each browser solve hands over a new clearance cookie
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.solves = 0
+
+    def fetch_with_session(self, url: str) -> tuple[str, dict[str, str], str]:
+        with self.lock:
+            self.solves += 1
+            clearance = f"v{self.solves}"
+        return GOOD_PAGE, {"cf_clearance": clearance}, "FakeChrome/1.0"
+
+    def fetch(self, url: str) -> str:
+        return self.fetch_with_session(url)[0]
+
+
+class FakeSite:
+    # Serves pages to whoever holds the current clearance cookie
+    def __init__(self, clearance: str = "v1"):
+        self.clearance = clearance
+        self.requests: list[httpx.Request] = []
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if f"cf_clearance={self.clearance}" in request.headers.get("cookie", ""):
+            return httpx.Response(200, text=GOOD_PAGE)
+        return httpx.Response(
+            403, text=CHALLENGE_PAGE, headers={"cf-mitigated": "challenge"}
+        )
+
+
+@pytest.fixture(autouse=True)
+def running_executors():
+    executors.start()
+    yield
+    executors.shutdown()
+
+
+def make_fetcher(site: FakeSite) -> tuple[PageFetcher, FakePool]:
+    pool = FakePool()
+    fetcher = PageFetcher(pool)
+    fetcher.client = httpx.AsyncClient(transport=httpx.MockTransport(site.handle))
+    return fetcher, pool
+
+
+def test_is_challenge_ignores_detection_scripts():
+    assert not is_challenge(httpx.Response(200, text=GOOD_PAGE))
+    assert is_challenge(httpx.Response(403, text=CHALLENGE_PAGE))
+    assert is_challenge(
+        httpx.Response(403, text="", headers={"cf-mitigated": "challenge"})
+    )
+
+
+def test_http_hit_reuses_the_browser_session():
+    site = FakeSite()
+    fetcher, pool = make_fetcher(site)
+
+    async def run():
+        # First fetch has no session yet and goes through the browser
+        await fetcher.fetch("https://partsouq.com/a")
+        return await fetcher.fetch("https://partsouq.com/b")
+
+    assert asyncio.run(run()) == GOOD_PAGE
+    assert (pool.solves, fetcher.browser_pages, fetcher.http_pages) == (1, 1, 1)
+    request = site.requests[-1]
+    assert request.headers["user-agent"] == "FakeChrome/1.0"
+    assert "cf_clearance=v1" in request.headers["cookie"]
+
+
+def test_challenge_falls_back_to_the_browser():
+    site = FakeSite()
+    fetcher, pool = make_fetcher(site)
+
+    async def run():
+        await fetcher.fetch("https://partsouq.com/a")
+        # Clearance expires, the next HTTP fetch lands on the challenge
+        site.clearance = "v2"
+        return await fetcher.fetch("https://partsouq.com/b")
+
+    assert asyncio.run(run()) == GOOD_PAGE
+    assert pool.solves == 2
+    assert fetcher.http_pages == 0
+    assert site.requests[-1].url.path == "/b"
+
+
+def test_waiters_reuse_the_new_session():
+    site = FakeSite()
+    fetcher, pool = make_fetcher(site)
+
+    async def run():
+        await fetcher.fetch("https://partsouq.com/a")
+        site.clearance = "v2"
+        return await asyncio.gather(
+            *(fetcher.fetch(f"https://partsouq.com/{i}") for i in range(5))
+        )
+
+    assert asyncio.run(run()) == [GOOD_PAGE] * 5
+    # One solve for the first fetch, one for the expired session
+    assert pool.solves == 2
+    assert fetcher.http_pages == 4
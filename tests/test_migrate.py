@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+import app.models as models
+from app.migrate import MigrationError, migrate
+
+# Tables as they were before the page cache and unique part number changes
+OLD_SCHEMA = [
+    """CREATE TABLE parts (
+        id INTEGER NOT NULL PRIMARY KEY,
+        number VARCHAR NOT NULL,
+        note VARCHAR,
+        name VARCHAR NOT NULL,
+        date_range VARCHAR
+    )""",
+    "CREATE INDEX ix_parts_id ON parts (id)",
+    """CREATE TABLE parts_souq_data (
+        id INTEGER NOT NULL PRIMARY KEY,
+        url VARCHAR NOT NULL,
+        html_string VARCHAR NOT NULL
+    )""",
+    "CREATE INDEX ix_parts_souq_data_id ON parts_souq_data (id)",
+]
+
+
+@pytest.fixture
+def old_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        for statement in OLD_SCHEMA:
+            conn.execute(text(statement))
+        conn.execute(
+            text(
+                "INSERT INTO parts_souq_data (url, html_string) "
+                "VALUES ('https://partsouq.com/g/1', '<html></html>')"
+            )
+        )
+    yield engine
+    engine.dispose()
+
+
+def add_parts(engine, *numbers: str):
+    with engine.begin() as conn:
+        for number in numbers:
+            conn.execute(
+                text("INSERT INTO parts (number, name) VALUES (:number, 'BOLT')"),
+                {"number": number},
+            )
+
+
+def test_migrate_upgrades_old_schema(old_engine):
+    add_parts(old_engine, "90105-08 343", "90105-10001")
+    migrate(old_engine)
+
+    inspector = inspect(old_engine)
+    columns = {c["name"]: c for c in inspector.get_columns("parts_souq_data")}
+    assert {"content_hash", "fetched_at", "parsed_hash"} <= columns.keys()
+    assert columns["html_string"]["nullable"]
+    assert {"parts_souq_blobs", "part_search_results"} <= set(
+        inspector.get_table_names()
+    )
+    indexes = {i["name"]: i for i in inspector.get_indexes("parts")}
+    assert indexes["ix_parts_number"]["unique"]
+
+    with old_engine.connect() as conn:
+        numbers = conn.execute(text("SELECT number FROM parts ORDER BY id")).scalars()
+        assert list(numbers) == ["90105-08343", "90105-10001"]
+        pages = conn.execute(text("SELECT url, html_string FROM parts_souq_data"))
+        assert pages.all() == [("https://partsouq.com/g/1", "<html></html>")]
+
+    # Runs against the current models once migrated
+    migrate(old_engine)
+    with old_engine.connect() as conn:
+        assert conn.execute(models.PartsSouqPageData.__table__.select()).all()
+
+
+def test_migrate_stops_on_duplicate_numbers(old_engine):
+    add_parts(old_engine, "90105-0K010", "90105-0k 010")
+    with pytest.raises(MigrationError, match="90105-0K010"):
+        migrate(old_engine)
+
+    # Nothing is half applied
+    columns = {c["name"] for c in inspect(old_engine).get_columns("parts_souq_data")}
+    assert "content_hash" not in columns
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from app.parsers import parse_group_rows, parse_groups_html, parse_search_html
+
+FIXTURES = Path(__file__).parent.parent / "benchmarks" / "fixtures"
+BACKENDS = ["lxml", "html.parser", "html5lib"]
+
+
+def parse_fixture(name: str, html: str, backend: str):
+    if name == "groups.html":
+        return parse_groups_html(html, backend)
+    if name.startswith("group"):
+        return parse_group_rows(1, html, backend)
+    if name.startswith("search"):
+        return parse_search_html(html, backend)
+    raise ValueError(f"No parser for fixture {name}")
+
+
+@pytest.mark.parametrize(
+    "path", sorted(FIXTURES.glob("*.html")), ids=lambda path: path.name
+)
+def test_backends_agree(path: Path):
+    html = path.read_text()
+    results = {backend: parse_fixture(path.name, html, backend) for backend in BACKENDS}
+    assert results["lxml"], "fixture parsed to nothing"
+    for backend in BACKENDS[1:]:
+        assert results[backend] == results["lxml"], backend
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_groups_ignores_nested_table_rows(backend):
+    html = """
+    <html><body>
+    <table class="table-mage table table-bordered- table-stripped tree">
+      <tr><th>Name</th></tr>
+      <tr class="treegrid-1"><td>
+        <a href="/en/catalog/genuine/parts?gid=1">Engine</a>
+        <table><tr class="treegrid-99"><td>Tooltip</td></tr></table>
+      </td></tr>
+      <tr class="treegrid-2 treegrid-parent-1"><td>Cylinder head</td></tr>
+    </table>
+    </body></html>
+    """
+    groups = parse_groups_html(html, backend)
+    assert [group.id for group in groups] == [1, 2]
+    assert groups[1].parent_group_id == 1
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+
+import app.routers.souq_scraper_v2 as souq_scraper_v2
+from app.search_cache import SearchCache
+
+
+class FakeScraper:
+    # Searches never leave the process, each scrape takes a while
+    def __init__(self):
+        self.urls: list[str] = []
+        self.running = 0
+        self.most_running = 0
+
+    async def fetch_and_parse(self, url, parse, *args):
+        self.urls.append(url)
+        self.running += 1
+        self.most_running = max(self.most_running, self.running)
+        await asyncio.sleep(0.05)
+        self.running -= 1
+        return [{"url": url}]
+
+
+@pytest.fixture
+def scraper(monkeypatch) -> FakeScraper:
+    scraper = FakeScraper()
+    cache = SearchCache(max_entries=10, ttl=3600, stale_ttl=86400)
+    monkeypatch.setattr(souq_scraper_v2, "fetch_and_parse", scraper.fetch_and_parse)
+    monkeypatch.setattr(souq_scraper_v2, "search_cache", cache)
+    return scraper
+
+
+def test_cache_hit_returns_while_every_slot_is_held(scraper):
+    async def run():
+        await souq_scraper_v2.search_part("CACHED")
+        limit = asyncio.Semaphore(1)
+        async with limit:
+            cached = await asyncio.wait_for(
+                souq_scraper_v2.search_part("CACHED", limit), timeout=0.5
+            )
+            # A miss does wait for a slot
+            miss = asyncio.create_task(souq_scraper_v2.search_part("MISS", limit))
+            await asyncio.sleep(0.2)
+            assert not miss.done()
+        await miss
+        return cached
+
+    assert asyncio.run(run())
+    assert len(scraper.urls) == 2
+
+
+def test_misses_stay_within_the_limit(scraper):
+    async def run():
+        limit = asyncio.Semaphore(2)
+        await asyncio.gather(
+            *(souq_scraper_v2.search_part(f"N{i}", limit) for i in range(6))
+        )
+
+    asyncio.run(run())
+    assert len(scraper.urls) == 6
+    assert scraper.most_running == 2
@@ -0,0 +1,86 @@
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.driver_pool import driver_pool
+from app.executors import executors
+from app.fetcher import page_fetcher
+from app.routers import groups_scraper, parts
+
+GROUPS_HTML = (
+    Path(__file__).parent.parent / "benchmarks" / "fixtures" / "groups.html"
+).read_text()
+PAGE_LOAD_SECONDS = 1.5
+
+
+class SlowDriver:
+    # Blocks its thread like a Selenium page load
+    page_source = GROUPS_HTML
+    current_url = "about:blank"
+
+    def uc_open_with_reconnect(self, url: str, reconnect_time: int):
+        time.sleep(PAGE_LOAD_SECONDS)
+
+    def uc_open(self, url: str):
+        time.sleep(PAGE_LOAD_SECONDS)
+
+    def quit(self):
+        pass
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    executors.start()
+    driver_pool.start()
+    yield
+    driver_pool.shutdown()
+    executors.shutdown()
+
+
+@pytest.fixture
+def client(db, monkeypatch):
+    monkeypatch.setattr(driver_pool, "driver_factory", SlowDriver)
+    monkeypatch.setattr(page_fetcher, "enabled", False)
+    monkeypatch.setattr(executors, "parse_workers", 1)
+
+    app = FastAPI(lifespan=lifespan)
+    app.include_router(groups_scraper.router)
+    app.include_router(parts.router)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_reads_stay_fast_during_a_crawl(client):
+    responses = []
+    scrape = threading.Thread(
+        target=lambda: responses.append(client.post("/groups/scrape"))
+    )
+    scrape.start()
+    time.sleep(0.1)
+
+    latencies: list[float] = []
+
+    def read():
+        for _ in range(10):
+            start = time.perf_counter()
+            assert client.get("/parts/").status_code == 200
+            latencies.append(time.perf_counter() - start)
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+    # Every read finished while the page load was still blocking
+    assert scrape.is_alive()
+    scrape.join()
+    assert responses[0].status_code == 200
+    assert len(responses[0].json()) == 449
+
+    assert len(latencies) == 40
+    assert max(latencies) < 0.5
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+
+import app.crud as crud
+from app.search_cache import SearchCache, utc_timestamp
+
+FETCHED_AT = datetime(2025, 1, 15, 12, 0, tzinfo=timezone.utc)
+
+
+def test_utc_timestamp_keeps_the_instant():
+    tokyo = FETCHED_AT.astimezone(timezone(timedelta(hours=9)))
+    naive_utc = FETCHED_AT.replace(tzinfo=None)
+    assert utc_timestamp(tokyo) == FETCHED_AT.timestamp()
+    assert utc_timestamp(naive_utc) == FETCHED_AT.timestamp()
+
+
+def test_load_restores_entry_age(db):
+    fetched_at = datetime.now(timezone.utc) - timedelta(minutes=30)
+    crud.post_search_result(db, "90105-08343", [{"name": "BOLT"}], fetched_at)
+
+    cache = SearchCache(max_entries=10, ttl=3600, stale_ttl=86400, persist=True)
+    cache.load()
+
+    entry = cache._entries["90105-08343"]
+    assert entry.results == [{"name": "BOLT"}]
+    assert abs(time.time() - entry.fetched_at - 1800) < 5
+
+
+def test_failed_save_still_returns_results(db, monkeypatch):
+    def fail(*args):
+        raise RuntimeError("database is down")
+
+    monkeypatch.setattr(crud, "post_search_result", fail)
+    cache = SearchCache(max_entries=10, ttl=0, stale_ttl=86400, persist=True)
+
+    async def load():
+        return [{"name": "BOLT"}]
+
+    async def run():
+        results = await cache.get("90105-08343", load)
+        # Stale entry, refreshed in the background and saved again
+        await cache.get("90105-08343", load)
+        await asyncio.gather(*cache._refreshing.values())
+        await cache.shutdown()
+        return results
+
+    assert asyncio.run(run()) == [{"name": "BOLT"}]
+    assert cache.stats()["save_errors"] == 2
+    assert cache.stats()["refreshes"] == 1
+    assert cache.stats()["refresh_errors"] == 0
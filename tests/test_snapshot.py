@@ -0,0 +1,68 @@
+import msgpack
+import pytest
+from sqlalchemy import select
+
+import app.crud as crud
+import app.schemas as schemas
+from app.manage import main
+from app.snapshot import CATALOG_TABLES, FORMAT, PAGE_TABLES, import_snapshot
+
+
+def add_catalog(db):
+    crud.post_bulk_groups(
+        db,
+        [
+            schemas.CreateGroup(id=1, name="Engine", diagrams_url="https://p/1"),
+            schemas.CreateGroup(id=2, name="Head", parent_group_id=1),
+        ],
+    )
+    crud.post_bulk_diagram_rows(
+        db,
+        [schemas.DiagramRow(id=10, name="Cylinder", img_url=None, parent_group_id=1)],
+    )
+    crud.post_bulk_part_rows(
+        db,
+        [
+            schemas.PartRow("90105-0K010", "FOR LHD", "BOLT", "199801-200708", 10),
+            schemas.PartRow("90080-36057", None, "NUT", None, 10),
+        ],
+    )
+    crud.post_html_url(
+        db,
+        schemas.CreatePartsSouqPageData(id=1, url="https://p/1", html_string="<div/>"),
+    )
+
+
+def dump(db, tables) -> dict[str, list]:
+    return {
+        table.name: db.execute(select(table).order_by(*table.primary_key.columns)).all()
+        for table in tables
+    }
+
+
+@pytest.mark.parametrize("pages", [False, True], ids=["catalog", "pages"])
+def test_round_trip(db, tmp_path, pages):
+    add_catalog(db)
+    tables = CATALOG_TABLES + (PAGE_TABLES if pages else [])
+    before = dump(db, tables)
+    path = str(tmp_path / "catalog.msgpack.gz")
+    args = ["export-snapshot", path] + (["--pages"] if pages else [])
+    main(args)
+
+    crud.wipe_parts(db)
+    crud.post_bulk_groups(db, [schemas.CreateGroup(id=3, name="Stray")])
+    main(["import-snapshot", path])
+
+    db.expire_all()
+    assert dump(db, tables) == before
+    assert all(before[table.name] for table in tables)
+
+
+def test_bad_version_exits_cleanly(db, tmp_path):
+    path = tmp_path / "future.msgpack"
+    path.write_bytes(msgpack.packb({"format": FORMAT, "version": 99, "tables": []}))
+
+    with pytest.raises(ValueError, match="version 99"):
+        import_snapshot(db, str(path))
+    with pytest.raises(SystemExit, match="Import failed: Unsupported snapshot"):
+        main(["import-snapshot", str(path)])
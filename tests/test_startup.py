@@ -0,0 +1,24 @@
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.db import engine
+from app.main import app
+from app.manage import measure_startup
+from app.search_cache import search_cache
+
+
+def test_startup_within_budget(db, monkeypatch):
+    # Fresh interpreter on this session's database, default settings otherwise
+    monkeypatch.setenv("SQLALCHEMY_STRING", engine.url.render_as_string(False))
+    monkeypatch.delenv("ENABLE_SCRAPERS", raising=False)
+    timings = measure_startup()
+    assert timings["import_ms"] <= settings.startup_import_budget_ms
+    assert timings["first_request_ms"] <= settings.startup_first_request_budget_ms
+
+
+def test_starts_without_schema(monkeypatch):
+    # No create-schema yet, the persisted search cache is skipped
+    monkeypatch.setattr(search_cache, "persist", True)
+    with TestClient(app) as client:
+        assert client.get("/metrics").status_code == 200
+    assert not search_cache.persist